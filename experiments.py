@@ -1,6 +1,8 @@
-from math import floor
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from math import floor, prod
 from os import listdir
-from os.path import join
+from os.path import join, getsize
 from time import time
 
 import cpmpy as cp
@@ -11,12 +13,20 @@ from cpmpy.expressions.core import Operator
 from cpmpy.transformations.normalize import toplevel_list
 from cpmpy.transformations.get_variables import get_variables
 from cpmpy.solvers.solver_interface import ExitStatus
+from cpmpy.tools.explain.utils import make_assump_model
 from natsort import natsorted
 from tqdm import tqdm
+import pandas as pd
 
 from benchmarks.rcpsp import read_rcpsp
+from benchmarks.generated import generate_random_alldiffs, generate_random_gcc, generate_random_cumulatives, \
+    generate_set_instance
 from globalconstraints import *
-from utils import init_solver_with_search_order, plot_results
+from models import get_random_alldiff_model, get_random_gcc_model, get_random_cumulative_model, get_set_model, \
+    get_rcpsp_model, get_xcsp3_model
+from globalconstraints.profiler import profiler
+from globalconstraints.deadline import Deadline, limit_time
+from utils import init_solver_with_search_order, plot_results, append_result, get_finished_keys, result_key, read_results
 
 
 def setup_maxcsp_experiment(model_func, data, global_name, global_cls):
@@ -51,20 +61,39 @@ def setup_maxcsp_experiment(model_func, data, global_name, global_cls):
 
     return soft, hard, weights
 
-def compute_maxcsp(soft, hard, weights, solver, search_order="default", **solver_kwargs):
+def build_maxcsp_params(**kwargs):
+    """
+        Build the parameters of a Max-CSP (or assumption) experiment.
+        Used as a lazy builder, so the CPMpy model is only created in the process running the experiment.
+    """
+    soft, hard, weights = setup_maxcsp_experiment(**kwargs)
+    return dict(soft=soft, hard=hard, weights=weights)
+
+def build_model_params(model_func, **data):
+    """
+        Build the parameters of an experiment solving a model directly.
+    """
+    return dict(model=model_func(**data))
 
+def compute_maxcsp(soft, hard, weights, solver, search_order="default", decompose_kwargs=dict(), hints=False, **solver_kwargs):
+
+    deadline = Deadline(solver_kwargs.get("time_limit")) # shared by the initialization and solving
     model, soft, assump = make_assump_model(soft=soft, hard=hard)
     model.maximize(cp.sum(weights * assump))
 
     timings = dict()
     try: # catch potential timeout
         start = time()
-        solver = init_solver_with_search_order(model, solver, assump, search_order, **solver_kwargs)
+        solver = init_solver_with_search_order(model, solver, assump, search_order, decompose_kwargs,
+                                               hints=hints, weights=weights, deadline=deadline, **solver_kwargs)
         timings['init_time'] = time() - start
+        solve_kwargs = limit_time(solver_kwargs, deadline) # only solve in the remaining time
     except TimeoutError:
-        return dict(status = "timeout in decompose", **timings)
+        return dict(status = "timeout in decompose", **timings, **profiler.summary())
+    timings.update(profiler.summary()) # time spent in each phase of the initialization
+    timings['solve_budget'] = solve_kwargs.get("time_limit")
 
-    res = solver.solve(**solver_kwargs) # solve the model
+    res = solver.solve(**solve_kwargs) # solve the model
     timings['solve_time'] = solver.status().runtime
 
     status = solver.status().exitstatus
@@ -77,19 +106,24 @@ def compute_maxcsp(soft, hard, weights, solver, search_order="default", **solver
 
     raise ValueError(f"Unknown exit status {model.status().exitstatus}")
 
-def justsolve(model, solver, search_order, **solver_kwargs):
+def justsolve(model, solver, search_order, decompose_kwargs=dict(), hints=False, **solver_kwargs):
 
+    deadline = Deadline(solver_kwargs.get("time_limit")) # shared by the initialization and solving
     bvs = [v for v in get_variables(model.constraints) if v.name.startswith("IMPL_")]
 
     timings = dict()
     try:  # catch potential timeout
         start = time()
-        solver = init_solver_with_search_order(model, solver, bvs, search_order, **solver_kwargs)
+        solver = init_solver_with_search_order(model, solver, bvs, search_order, decompose_kwargs, hints=hints,
+                                               deadline=deadline, **solver_kwargs)
         timings['init_time'] = time() - start
+        solve_kwargs = limit_time(solver_kwargs, deadline) # only solve in the remaining time
     except TimeoutError:
-        return dict(status="timeout in decompose", **timings)
+        return dict(status="timeout in decompose", **timings, **profiler.summary())
+    timings.update(profiler.summary()) # time spent in each phase of the initialization
+    timings['solve_budget'] = solve_kwargs.get("time_limit")
 
-    res = solver.solve(**solver_kwargs)
+    res = solver.solve(**solve_kwargs)
     timings['solve_time'] = solver.status().runtime
 
     status = solver.status().exitstatus
@@ -105,19 +139,25 @@ def justsolve(model, solver, search_order, **solver_kwargs):
 
     raise ValueError(f"Unknown exit status {model.status().exitstatus}")
 
-def get_solver_core(soft, hard, solver, search_order="default", weights=None, **solver_kwargs):
+def get_solver_core(soft, hard, solver, search_order="default", weights=None, decompose_kwargs=dict(), hints=False,
+                    **solver_kwargs):
 
+    deadline = Deadline(solver_kwargs.get("time_limit")) # shared by the initialization and solving
     model, soft, assump = make_assump_model(soft=soft, hard=hard)
 
     timings = dict()
     try:  # catch potential timeout
         start = time()
-        solver = init_solver_with_search_order(model, solver, assump, search_order, **solver_kwargs)
+        solver = init_solver_with_search_order(model, solver, assump, search_order, decompose_kwargs,
+                                               hints=hints, weights=weights, deadline=deadline, **solver_kwargs)
         timings['init_time'] = time() - start
+        solve_kwargs = limit_time(solver_kwargs, deadline) # only solve in the remaining time
     except TimeoutError:
-        return dict(status="timeout in decompose", **timings)
+        return dict(status="timeout in decompose", **timings, **profiler.summary())
+    timings.update(profiler.summary()) # time spent in each phase of the initialization
+    timings['solve_budget'] = solve_kwargs.get("time_limit")
 
-    res = solver.solve(assumptions=assump, **solver_kwargs)  # solve the model under assumptions
+    res = solver.solve(assumptions=assump, **solve_kwargs)  # solve the model under assumptions
     timings['solve_time'] = solver.status().runtime
 
     status = solver.status().exitstatus
@@ -136,7 +176,7 @@ def get_solver_core(soft, hard, solver, search_order="default", weights=None, **
 
 def get_random_alldiff_configs(solver, num_experiments):
 
-    classes = [BinaryDecomposedAllDifferent, AllDifferentAuxHalfReif, AllDifferentAuxHalfReifDummySol]
+    classes = [BinaryDecomposedAllDifferent, DecomposedAllDifferent, AllDifferentAuxHalfReif, AllDifferentAuxHalfReifDummySol]
     if solver in ["cpo", "choco"]:
         classes += [NativeAllDifferent]
     i = 0
@@ -150,11 +190,11 @@ def get_random_alldiff_configs(solver, num_experiments):
                 data = generate_random_alldiffs(n_vars, n_cons, seed=seed)
 
                 for cls in classes:
-                    soft, hard, weights = setup_maxcsp_experiment(model_func=get_random_alldiff_model,
-                                                                  data=data,
-                                                                  global_name="AllDifferent",
-                                                                  global_cls=cls)
-                    yield dict(soft=soft, hard=hard, weights=weights), \
+                    builder = partial(build_maxcsp_params, model_func=get_random_alldiff_model,
+                                      data=data,
+                                      global_name="AllDifferent",
+                                      global_cls=cls)
+                    yield builder, \
                           dict(solver=solver, constraint=cls.__name__,
                                n_vars=n_vars, n_cons=n_cons, seed=seed)
 
@@ -174,18 +214,18 @@ def get_random_gcc_configs(solver, num_experiments):
             data = generate_random_gcc(n_vars, n_cons, lb=0, ub=15,p=0.5, seed=seed)
 
             for cls in classes:
-                soft, hard, weights = setup_maxcsp_experiment(model_func=get_random_gcc_model,
-                                                              data=data,
-                                                              global_name="GlobalCardinalityCount",
-                                                              global_cls=cls)
-                yield dict(soft=soft, hard=hard, weights=weights), \
+                builder = partial(build_maxcsp_params, model_func=get_random_gcc_model,
+                                  data=data,
+                                  global_name="GlobalCardinalityCount",
+                                  global_cls=cls)
+                yield builder, \
                       dict(solver=solver, constraint=cls.__name__,
                            n_vars=n_vars, n_cons=n_cons, seed=seed)
 
 def get_random_cumulative_configs(solver, num_experiments):
 
-    classes = [TaskDecomposedCumulative, CumulativeAuxHalfReif, CumulativeAuxHalfReifMinimal,
-               CumulativeAuxHalfReifDummy, CumulativeAuxHalfReifMinimalDummy]
+    classes = [TaskDecomposedCumulative, DecomposedCumulative, CumulativeAuxHalfReif, CumulativeAuxHalfReifMinimal,
+               CumulativeAuxHalfReifDummy, CumulativeAuxHalfReifMinimalDummy, CumulativeScaledHalfReif]
     if solver == "choco":
         classes += [NativeCumulative]
     i = 0
@@ -199,17 +239,17 @@ def get_random_cumulative_configs(solver, num_experiments):
                 data = generate_random_cumulatives(n_tasks, n_cons, lb=0, ub=50, p=0.5)
 
                 for cls in classes:
-                    soft, hard, weights = setup_maxcsp_experiment(model_func=get_random_cumulative_model,
-                                                                 data=data,
-                                                                 global_name="Cumulative",
-                                                                 global_cls=cls)
-                    yield dict(soft=soft, hard=hard, weights=weights), \
+                    builder = partial(build_maxcsp_params, model_func=get_random_cumulative_model,
+                                      data=data,
+                                      global_name="Cumulative",
+                                      global_cls=cls)
+                    yield builder, \
                           dict(solver=solver, constraint=cls.__name__,
                                n_tasks=n_tasks, n_cons=n_cons, seed=seed)
 
 def get_set_configs(solver, num_experiments):
 
-    classes = ["decomp", "aux", "auxdummy"]
+    classes = ["decomp", "decompauto", "aux", "auxdummy"]
     if solver in {"cpo", "choco"}:
         classes += ["native"]
     i = 0
@@ -222,16 +262,16 @@ def get_set_configs(solver, num_experiments):
 
             data = generate_set_instance(n_cards, size_of_set=size_of_set, seed=seed)
             for cls in classes:
-                model = get_set_model(**data,global_type=cls)
+                builder = partial(build_model_params, model_func=get_set_model, **data, global_type=cls)
 
-                yield  dict(model=model),\
+                yield  builder,\
                        dict(solver=solver, constraint=cls,
                             n_cards=n_cards, size_of_set=size_of_set, seed=seed)
 
 def get_rcpsp_configs(solver, num_experiments):
 
-    classes = [TaskDecomposedCumulative, CumulativeAuxHalfReif, CumulativeAuxHalfReifMinimal,
-               CumulativeAuxHalfReifDummy, CumulativeAuxHalfReifMinimalDummy]
+    classes = [TaskDecomposedCumulative, DecomposedCumulative, CumulativeAuxHalfReif, CumulativeAuxHalfReifMinimal,
+               CumulativeAuxHalfReifDummy, CumulativeAuxHalfReifMinimalDummy, CumulativeScaledHalfReif]
     if solver == "choco":
         classes += [NativeCumulative]
     i = 0
@@ -244,17 +284,17 @@ def get_rcpsp_configs(solver, num_experiments):
 
         data = read_rcpsp(join(dirname,fname))
         for cls in classes:
-            soft, hard, weights = setup_maxcsp_experiment(model_func=get_rcpsp_model,
-                                                          data=data,
-                                                          global_name="Cumulative",
-                                                          global_cls=cls)
+            builder = partial(build_maxcsp_params, model_func=get_rcpsp_model,
+                              data=data,
+                              global_name="Cumulative",
+                              global_cls=cls)
 
-            yield dict(soft=soft, hard=hard, weights=weights), \
+            yield builder, \
                   dict(solver=solver, constraint=cls.__name__, fname=fname)
 
 def get_xcsp3_configs(solver, num_experiments):
 
-    classes = ["decomp", "aux", "auxdummy", "auxminimal", "auxminimaldummy"]
+    classes = ["decomp", "decompauto", "aux", "auxdummy", "auxminimal", "auxminimaldummy"]
 
     xcsp3_overview = pd.read_csv("benchmarks/xcsp3_overview.csv")
 
@@ -274,23 +314,109 @@ def get_xcsp3_configs(solver, num_experiments):
 
         for cls in classes:
             print(solver, cls)
-            soft, hard, weights = setup_maxcsp_experiment(model_func = get_xcsp3_model,
-                                                          data=dict(path=join(dirname,fname)),
-                                                          global_name="global_type",
-                                                          global_cls=cls)
+            builder = partial(build_maxcsp_params, model_func=get_xcsp3_model,
+                              data=dict(path=join(dirname,fname)),
+                              global_name="global_type",
+                              global_cls=cls)
 
-            yield dict(soft=soft, hard=hard, weights=weights), \
+            yield builder, \
                 dict(solver=solver, constraint=cls, fname=fname)
 
 
-if __name__ == "__main__":
-    from models import get_random_alldiff_model, get_random_gcc_model, get_random_cumulative_model, get_set_model, \
-    get_rcpsp_model, get_xcsp3_model
-    from benchmarks.generated import generate_random_alldiffs, generate_random_gcc, generate_random_cumulatives, \
-    generate_set_instance
+###############################################
+#          Running the experiments            #
+###############################################
 
-    import pandas as pd
-    from cpmpy.tools.explain.utils import make_assump_model
+def estimate_cost(builder, config):
+    """
+        Rough estimate of how long an experiment will take, used to schedule the longest experiments first.
+        Uses the size of the instance file if available, otherwise the product of the size parameters in the config.
+        For RCPSP, all instances have the same number of tasks and soft constraints,
+            so the number of tasks times the horizon is used instead.
+    """
+    data = builder.keywords.get("data", builder.keywords)
+    if "path" in data:
+        return getsize(data["path"])
+    if "duration" in data and "horizon" in data:
+        return len(data["duration"]) * data["horizon"]
+    return prod(val for key, val in config.items() if key != "seed" and isinstance(val, int))
+
+def run_experiment(builder, config, experiment_type, solver, search_order, decompose_kwargs=dict(), hints=False,
+                   **solver_kwargs):
+    """
+        Build and run a single experiment.
+        The model is built here, as CPMpy expressions and solvers cannot be sent to a worker process.
+    """
+    experiment_params = builder()
+    if experiment_type == "maxcsp":
+        result = compute_maxcsp(solver=solver, search_order=search_order, decompose_kwargs=decompose_kwargs, hints=hints,
+                                **experiment_params, **solver_kwargs)
+    elif experiment_type == "assump":
+        result = get_solver_core(solver=solver, search_order=search_order, decompose_kwargs=decompose_kwargs, hints=hints,
+                                 **experiment_params, **solver_kwargs)
+    elif experiment_type == "justsolve":
+        result = justsolve(solver=solver, search_order=search_order, decompose_kwargs=decompose_kwargs, hints=hints,
+                           **experiment_params, **solver_kwargs)
+    else:
+        raise ValueError(f"Unknown experiment type {experiment_type}")
+
+    result.update(config)
+    return result
+
+def run_experiments(configs, experiment_type, solver, search_order, n_workers=1, store=None, decompose_kwargs=dict(),
+                    hints=False, **solver_kwargs):
+    """
+        Run all experiments in `configs`, using `n_workers` worker processes.
+        Experiments are submitted longest-expected-first, so the tail of the run does not leave workers idle.
+        Results are returned in the same order as `configs`.
+
+        If `store` is given, each result is appended to this result store as soon as it is finished,
+            and experiments already in the store are skipped.
+        The experiment type, search order, hints, `decompose_kwargs` and `solver_kwargs` are added to the config of each result,
+            so only experiments run with the same options are skipped.
+        With multiple workers, an experiment raising an error gets a result with status "error", and is retried on restart.
+        `decompose_kwargs` are passed on to `decompose_globals`.
+        If `hints` is True, solvers are warm-started from the witnesses of the globals.
+    """
+    # options changing the results are part of the config, so results with other options are not taken as finished
+    options = dict(experiment_type=experiment_type, search_order=search_order, hints=hints, **solver_kwargs,
+                   **{f"decompose_{key}" : val for key, val in decompose_kwargs.items()})
+    configs = ((builder, dict(config, **options)) for builder, config in configs)
+    if store is not None:
+        finished = get_finished_keys(store)
+        configs = ((builder, config) for builder, config in configs if result_key(config) not in finished)
+
+    if n_workers == 1:
+        results = []
+        for builder, config in tqdm(configs):
+            result = run_experiment(builder, config, experiment_type, solver, search_order, decompose_kwargs, hints,
+                                    **solver_kwargs)
+            if store is not None:
+                append_result(store, result, config)
+            results.append(result)
+        return results
+
+    configs = list(configs)
+    order = sorted(range(len(configs)), key=lambda i: estimate_cost(*configs[i]), reverse=True)
+
+    results = [None] * len(configs)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(run_experiment, *configs[i], experiment_type, solver, search_order, decompose_kwargs,
+                                   hints, **solver_kwargs) : i
+                   for i in order}
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e: # record the error, so the executor does not discard the other results
+                results[i] = dict(status="error", error=f"{type(e).__name__}: {e}", **configs[i][1])
+            if store is not None:
+                append_result(store, results[i], configs[i][1])
+
+    return results
+
+
+if __name__ == "__main__":
 
     do_plot = True
 
@@ -301,8 +427,14 @@ if __name__ == "__main__":
     benchmark = "random-alldiff"
     solver = "ortools"
     experiment_type = "maxcsp"
-    search_order="default"
+    search_order="default" # "default", "orig-bv-aux", "bv-orig-aux" or "bvmax-orig-aux"
     TIMEOUT = 60 # change to 3600s for full experiment run
+    n_workers = 1 # number of experiments to run in parallel
+    # set batch=True to check feasibility of all aux globals in a single solver,
+    # or n_workers > 1 to check them concurrently.
+    # set share=True to share auxiliary variables between identical globals, and between globals with the same indicator
+    decompose_kwargs = dict(batch=False, n_workers=1, share=False)
+    hints = False # warm-start the solver from the witnesses of the globals (not supported by choco)
 
     solver_kwargs = dict(time_limit=TIMEOUT)
     if solver == "ortools":
@@ -326,22 +458,15 @@ if __name__ == "__main__":
         raise ValueError(f"Unknown benchmark {benchmark}")
 
 
-    results = []
-    for i, (experiment_params, config) in enumerate(tqdm(configs)):
-        if experiment_type == "maxcsp":
-            result  = compute_maxcsp(solver=solver, search_order=search_order, **experiment_params, **solver_kwargs)
-        elif experiment_type == "assump":
-            result = get_solver_core(solver=solver, search_order=search_order, **experiment_params, **solver_kwargs)
-        elif experiment_type == "justsolve":
-            result  = justsolve(solver=solver, search_order=search_order, **experiment_params, **solver_kwargs)
-        else:
-            raise ValueError(f"Unknown experiment type {experiment_type}")
-
-        result.update(config)
-        results.append(result)
+    # results are appended to the store as soon as they are finished, restarting skips finished experiments
+    name = f"{benchmark}-{solver}-{experiment_type}-{search_order}-{TIMEOUT}s" + ("-hints" if hints else "") \
+           + "".join(f"-{key}={val}" for key, val in sorted(decompose_kwargs.items()))
+    store = f"results/{name}.jsonl"
+    run_experiments(configs, experiment_type, solver, search_order, n_workers=n_workers, store=store,
+                    decompose_kwargs=decompose_kwargs, hints=hints, **solver_kwargs)
 
-    df = pd.DataFrame(results)
-    df.to_pickle(f"results/{benchmark}-{solver}-{experiment_type}-{search_order}.df")
+    df = read_results(store)
+    df.to_pickle(f"results/{name}.df")
 
     if do_plot:
         plot_results(df, solver=solver, benchmark=benchmark, experiment_type=experiment_type, search_order=search_order)
@@ -6,4 +6,7 @@ from .negative_table import *
 from .regular import *
 from .table import *
 from .nooverlap import *
-from .inverse import *
\ No newline at end of file
+from .inverse import *
+from .circuit import *
+from .ordering import *
+from .functions import *
@@ -2,6 +2,7 @@ import cpmpy as cp
 from cpmpy.expressions.utils import get_bounds, all_pairs
 
 from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .matching import alldifferent_sol, alldifferent_except_n_sol
 from cpmpy.solvers.solver_interface import ExitStatus
 
 """
@@ -32,12 +33,58 @@ class BinaryDecomposedAllDifferent(CustomAllDifferent):
     def toplevel(self):
         return []
 
+    def get_pairs(self):
+        """
+            Pairs of arguments which can take the same value, pairs with disjoint domains can be skipped.
+        """
+        bounds = {i: get_bounds(x) for i, x in enumerate(self.args)}
+        return [(self.args[i], self.args[j]) for i, j in all_pairs(range(len(self.args)))
+                if bounds[i][0] <= bounds[j][1] and bounds[j][0] <= bounds[i][1]]
+
     def iftrue(self):
-        return [x != y for x,y in all_pairs(self.args)]
+        return [x != y for x,y in self.get_pairs()]
 
     def iffalse(self):
         return []
 
+class ValueDecomposedAllDifferent(BinaryDecomposedAllDifferent):
+    """
+        Decomposition with an at-most-one constraint for each value, over the arguments which can take that value.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "value_alldifferent"
+
+    def get_value_range(self):
+        lbs, ubs = get_bounds(list(self.args))
+        return range(min(lbs), max(ubs) + 1)
+
+    def iftrue(self):
+        bounds = [get_bounds(x) for x in self.args]
+        cons = []
+        for v in self.get_value_range():
+            args = [x for x, (lb, ub) in zip(self.args, bounds) if lb <= v <= ub]
+            if len(args) >= 2:
+                cons.append(cp.sum([x == v for x in args]) <= 1)
+        return cons
+
+class DecomposedAllDifferent(ValueDecomposedAllDifferent):
+    """
+        Picks the per-value decomposition when the value range is smaller than the number of pairs to decompose,
+            and the binary decomposition otherwise.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "decomposed_alldifferent"
+
+    def iftrue(self):
+        pairs = self.get_pairs()
+        if len(self.get_value_range()) < len(pairs):
+            return super().iftrue()
+        return [x != y for x,y in pairs]
+
 class AllDifferentAuxHalfReif(AuxGlobal, CustomAllDifferent):
 
     def __init__(self, *args, **kwargs):
@@ -47,6 +94,9 @@ class AllDifferentAuxHalfReif(AuxGlobal, CustomAllDifferent):
         self.to_replace = list(range(len(self.args)))
         self.cpm_global = cp.AllDifferent
 
+    def find_sol(self):
+        return alldifferent_sol(self.args)
+
 class AllDifferentAuxHalfReifDummySol(AllDifferentAuxHalfReif):
 
     def __init__(self, *args, **kwargs):
@@ -57,14 +107,49 @@ class AllDifferentAuxHalfReifDummySol(AllDifferentAuxHalfReif):
         self.cpm_global = cp.AllDifferent
 
     def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
+
+class CustomAllDifferentExceptN(CustomGlobal, cp.AllDifferentExceptN):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "custom_alldifferent_except_n"
+
+        self.cpm_global = cp.AllDifferentExceptN
+
+class NativeAllDifferentExceptN(CustomAllDifferentExceptN, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_alldifferent_except_n"
+
+class AllDifferentExceptNAuxHalfReif(AuxGlobal, CustomAllDifferentExceptN):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_alldifferent_except_n"
+
+        # only replace the array, the excepted values are constants
+        self.to_replace = [0]
+        self.cpm_global = cp.AllDifferentExceptN
+
+    def find_sol(self):
+        return alldifferent_except_n_sol(self.args)
+
+class AllDifferentExceptNAuxHalfReifDummy(AllDifferentExceptNAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_alldifferent_except_n_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-        assert len(self.sol)  == len(self.new_args)
-        lst = []
-        for i, (arg, s) in enumerate(zip(self.new_args, self.sol)):
-            if i in self.to_replace:
-                lst.append(arg == s)
-        return flatlist(lst)
+        return self.fix_to_sol()
 
 if __name__ == "__main__":
 
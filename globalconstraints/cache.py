@@ -0,0 +1,137 @@
+import atexit
+import hashlib
+import os
+import shelve
+from collections import OrderedDict
+
+from cpmpy.expressions.core import Expression
+from cpmpy.expressions.utils import is_any_list, is_num
+from cpmpy.expressions.variables import _BoolVarImpl, _NumVarImpl, NegBoolView
+
+
+class SatCache:
+    """
+        Cache for the results of `AuxGlobal.check_if_sat`.
+
+        Results are keyed on a canonical structural hash of the global constraint and its arguments.
+        Variables are reduced to their domain and their order of first occurrence,
+            so two constraints over different variables with the same domains share a cache entry.
+
+        Entries are kept in memory with LRU eviction.
+        If `fname` is given, entries are also persisted to disk and shared between runs.
+        The file is opened once, and only used by the process setting `fname`, as shelve does not support concurrent writers.
+            Worker processes (e.g., of `check_if_sat_parallel` or a parallel experiment run) only use their in-memory cache.
+    """
+
+    def __init__(self, maxsize=10000, fname=None):
+        self.maxsize = maxsize
+        self.db = None
+        self.fname = fname
+        self.entries = OrderedDict()
+        self.hits, self.misses = 0, 0
+        atexit.register(self.close)
+        os.register_at_fork(after_in_child=self.detach)
+
+    @property
+    def fname(self):
+        return self._fname
+
+    @fname.setter
+    def fname(self, fname):
+        self.close()
+        self._fname, self.owner = fname, os.getpid()
+
+    def get_db(self):
+        """
+            The shelve persisting the entries, opened on first use.
+            None if the cache is not persisted, or in another process than the one setting `fname`.
+        """
+        if self._fname is None or os.getpid() != self.owner:
+            return None
+        if self.db is None:
+            self.db = shelve.open(self._fname)
+        return self.db
+
+    def close(self):
+        """
+            Close the shelve, if opened by this process.
+        """
+        if self.db is not None and os.getpid() == self.owner:
+            self.db.close()
+            self.db = None
+
+    def detach(self):
+        """
+            Called in forked child processes, which should not use the shelve of their parent.
+            The reference is kept, as closing it in the child would write to the file.
+        """
+        self.inherited_db, self.db = self.db, None
+
+    def key(self, cpm_global, args):
+        """
+            Compute the cache key for `cpm_global(*args)`.
+            Returns None if the arguments cannot be canonicalized (e.g., nested expressions).
+        """
+        varmap = dict()
+
+        def canonical(arg):
+            if is_any_list(arg):
+                return tuple(canonical(a) for a in arg)
+            if isinstance(arg, NegBoolView):
+                return ("~", canonical(arg._bv))
+            if isinstance(arg, _NumVarImpl):
+                if arg not in varmap:
+                    varmap[arg] = len(varmap)
+                vtype = "bool" if isinstance(arg, _BoolVarImpl) else "int"
+                return (vtype, varmap[arg], int(arg.lb), int(arg.ub))
+            if is_num(arg):
+                return int(arg)
+            if isinstance(arg, Expression):
+                raise ValueError(f"Cannot canonicalize nested expression {arg}")
+            return repr(arg)
+
+        try:
+            struct = (getattr(cpm_global, "__name__", repr(cpm_global)), canonical(args))
+        except ValueError:
+            return None
+        return hashlib.sha1(repr(struct).encode()).hexdigest()
+
+    def get(self, key):
+        """
+            Get the stored solution for `key`.
+            Returns a tuple (found, sol), sol is None if the constraint is infeasible.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+        db = self.get_db()
+        if db is not None and key in db:
+            self.hits += 1
+            self._store(key, db[key])
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key, sol):
+        """
+            Store the solution for `key`, use None for infeasible constraints.
+        """
+        self._store(key, sol)
+        db = self.get_db()
+        if db is not None:
+            db[key] = sol
+
+    def _store(self, key, sol):
+        self.entries[key] = sol
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits, self.misses = 0, 0
+
+
+# cache used by all AuxGlobal constraints, set `sat_cache.fname` to persist it to disk
+sat_cache = SatCache()
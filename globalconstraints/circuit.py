@@ -0,0 +1,43 @@
+import cpmpy as cp
+
+from .superclass import AuxGlobal, NativeGlobal, CustomGlobal
+
+
+class CustomCircuit(CustomGlobal, cp.Circuit):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "custom_circuit"
+
+        self.cpm_global = cp.Circuit
+
+class NativeCircuit(CustomCircuit, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_circuit"
+
+class CircuitAuxHalfReif(AuxGlobal, CustomCircuit):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_circuit"
+
+        self.to_replace = list(range(len(self.args)))
+        self.cpm_global = cp.Circuit
+
+    def get_aux_bounds(self, i):
+        # successors are indices in the circuit
+        return 0, len(self.args) - 1
+
+class CircuitAuxHalfReifDummy(CircuitAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_circuit_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
@@ -1,7 +1,7 @@
 import cpmpy as cp
 from cpmpy.expressions.utils import get_bounds, all_pairs
 
-from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal, solver_supports
 from cpmpy.solvers.solver_interface import ExitStatus
 
 """
@@ -16,7 +16,9 @@ class CustomCumulative(CustomGlobal, cp.Cumulative):
         super().__init__(*args, **kwargs)
         self.name = "custom_cumulative"
 
-        assert self.args[2] is None, "end should be None after refactoring, are you on the `no_end_cumulative` branch of CPMpy?"
+        if len(self.args) == 4: # CPMpy drops `end` from the arguments if it is None
+            self.update_args(list(self.args[:2]) + [None] + list(self.args[2:]))
+        assert self.args[2] is None, "end is not supported, post the end times as separate constraints"
         self.cpm_global = cp.Cumulative
 
 class NativeCumulative(CustomCumulative, NativeGlobal):
@@ -31,6 +33,18 @@ class TaskDecomposedCumulative(CustomCumulative, cp.Cumulative):
         super().__init__(*args, **kwargs)
         self.name = "taskd_cumulative"
 
+    def get_windows(self):
+        """
+            For each task, the earliest start and latest end under the current bounds.
+            A task can only be running at time t if earliest start <= t < latest end.
+        """
+        start, dur, end, demand, cap = self.args
+        windows = []
+        for s, d in zip(start, dur):
+            (slb, sub), (_, dub) = get_bounds(s), get_bounds(d)
+            windows.append((slb, sub + dub))
+        return windows
+
     def iftrue(self):
 
         start, dur, end, demand, cap = self.args
@@ -40,12 +54,23 @@ class TaskDecomposedCumulative(CustomCumulative, cp.Cumulative):
 
         njobs = len(start)
         cons = []
-        
+
+        windows = self.get_windows()
+        cap_lb, _ = get_bounds(cap)
         end = [start[i] + dur[i] for i in range(njobs)]
         # ensure task can only start if no enough capacity left
         for i in range(njobs):
-            running_demand = cp.sum([demand[j] * ((start[j] <= start[i]) & (end[j] > start[i])) for j in range(njobs) if i != j])
-            cons.append(running_demand + demand[i] <= cap)
+            # task j can only be running at the start of task i if their windows overlap
+            others = [j for j in range(njobs) if i != j
+                      and windows[j][0] <= get_bounds(start[i])[1] and windows[j][1] > windows[i][0]
+                      and get_bounds(dur[j])[1] > 0 and get_bounds(demand[j])[1] > 0]
+            if sum(get_bounds(demand[j])[1] for j in others) + get_bounds(demand[i])[1] <= cap_lb:
+                continue # can never exceed the capacity
+            running_demand = cp.sum([demand[j] * ((start[j] <= start[i]) & (end[j] > start[i])) for j in others])
+            if get_bounds(dur[i])[0] > 0:
+                cons.append(running_demand + demand[i] <= cap)
+            else: # a task without duration is never running
+                cons.append((dur[i] > 0).implies(running_demand + demand[i] <= cap))
 
         return cons
 
@@ -55,6 +80,80 @@ class TaskDecomposedCumulative(CustomCumulative, cp.Cumulative):
     def toplevel(self):
         return []
 
+class TimeDecomposedCumulative(TaskDecomposedCumulative):
+    """
+        Time-indexed decomposition, bounding the demand of the tasks running at each time point in the horizon.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "timed_cumulative"
+
+    def get_horizon(self):
+        windows = self.get_windows()
+        return min(lb for lb, _ in windows), max(ub for _, ub in windows)
+
+    def iftrue(self):
+
+        start, dur, end, demand, cap = self.args
+        assert end is None, "end should be None after refactoring"
+
+        njobs = len(start)
+        cons = []
+
+        windows = self.get_windows()
+        cap_lb, _ = get_bounds(cap)
+        lb, ub = self.get_horizon()
+        for t in range(lb, ub):
+            running = [j for j in range(njobs) if windows[j][0] <= t < windows[j][1]]
+            if sum(get_bounds(demand[j])[1] for j in running) <= cap_lb:
+                continue # can never exceed the capacity
+            cons.append(cp.sum([demand[j] * ((start[j] <= t) & (start[j] + dur[j] > t)) for j in running]) <= cap)
+
+        return cons
+
+class DecomposedCumulative(TimeDecomposedCumulative):
+    """
+        Picks the time-indexed decomposition when the horizon is small compared to the number of task pairs,
+            and the task-based decomposition otherwise.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "decomposed_cumulative"
+
+    def iftrue(self):
+        lb, ub = self.get_horizon()
+        if ub - lb < len(self.args[0]) ** 2:
+            return super().iftrue()
+        return TaskDecomposedCumulative.iftrue(self)
+
+
+class CumulativeScaledHalfReif(CustomCumulative):
+    """
+        Half-reification keeping the original starts and durations in a single top-level Cumulative.
+        The tasks are optional with the indicator as presence literal if the solver supports it natively,
+            otherwise the demand of each task is scaled by the indicator:
+            bv -> Cumulative(start, dur, demand, cap) becomes Cumulative(start, dur, [d * bv for d in demand], cap)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "scaled_cumulative"
+
+    def toplevel(self):
+        start, dur, end, demand, cap = self.args
+        bv = self.get_indicator()
+        if solver_supports(self.solver_kwargs.get("solver"), "cumulative_optional"):
+            return [cp.CumulativeOptional(start=list(start), duration=list(dur), demand=list(demand), capacity=cap,
+                                          is_present=[bv] * len(start))]
+        return [cp.Cumulative(start=list(start), duration=list(dur), demand=[d * bv for d in demand], capacity=cap)]
+
+    def iftrue(self):
+        return []
+
+    def iffalse(self):
+        return []
 
 class CumulativeAuxHalfReif(AuxGlobal, CustomCumulative):
 
@@ -78,9 +177,7 @@ class CumulativeAuxHalfReifDummy(CumulativeAuxHalfReif):
         if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-
-        assert len(self.sol) == len(self.args) == len(self.new_args)
-        return flatlist([na == val for na, val in zip(self.new_args, self.sol)])
+        return self.fix_to_sol()
 
 class CumulativeAuxHalfReifMinimal(AuxGlobal, CustomCumulative):
 
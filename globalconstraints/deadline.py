@@ -0,0 +1,40 @@
+from time import perf_counter
+
+
+class Deadline:
+    """
+        Wall-clock deadline shared by the initialization of a solver and the solve call itself.
+
+        Each stage only gets the time remaining until the deadline,
+            so initializing and solving a model together take at most `time_limit` seconds.
+        Without a time limit, the deadline never expires.
+    """
+
+    def __init__(self, time_limit=None):
+        self.start = perf_counter()
+        self.end = None if time_limit is None else self.start + time_limit
+
+    def elapsed(self):
+        return perf_counter() - self.start
+
+    def remaining(self):
+        if self.end is None:
+            return None
+        return max(self.end - perf_counter(), 0)
+
+    def expired(self):
+        return self.end is not None and perf_counter() >= self.end
+
+
+def limit_time(solver_kwargs, deadline=None):
+    """
+        Copy of `solver_kwargs` with the time limit capped to the time remaining until `deadline`, if any.
+        Raises a TimeoutError if the deadline has expired.
+    """
+    if deadline is None or deadline.end is None:
+        return solver_kwargs
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise TimeoutError(f"Deadline exceeded after {deadline.elapsed():.2f}s")
+    time_limit = solver_kwargs.get("time_limit")
+    return dict(solver_kwargs, time_limit=remaining if time_limit is None else min(time_limit, remaining))
@@ -0,0 +1,146 @@
+"""
+    Solver-free feasibility checks for the extensional global constraints (Table, NegativeTable and Regular).
+    All of them work on the bounds of the variables, using NumPy to filter the table or transition relation.
+
+    Each function returns a tuple (decided, sol), with the same convention as in `matching.py`:
+        - decided is False when the arguments are not plain variables or constants, the caller should use a solver
+        - sol is a witness in the same shape as `argvals(args)`, or None if the constraint is infeasible
+"""
+import itertools
+
+import numpy as np
+from cpmpy.expressions.utils import is_num
+
+from .matching import get_domain, get_domains, get_plain_bounds, is_plain
+
+
+def get_bounds_array(args):
+    """
+        Lower and upper bounds of plain variables or constants as NumPy arrays, None for any other expression.
+    """
+    bounds = [get_plain_bounds(a) for a in args]
+    if any(b is None for b in bounds):
+        return None
+    return np.array([lb for lb, _ in bounds], dtype=int), np.array([ub for _, ub in bounds], dtype=int)
+
+def rows_in_bounds(args, table):
+    """
+        Mask of the rows in `table` that fit the bounds of `args`.
+        Variables occurring multiple times in `args` should take the same value in all of their columns.
+    """
+    lbs, ubs = get_bounds_array(args)
+    table = np.asarray(table, dtype=int).reshape(-1, len(args))
+    mask = np.all((table >= lbs) & (table <= ubs), axis=1)
+
+    first = dict()
+    for i, arg in enumerate(args):
+        if is_num(arg):
+            continue
+        if arg in first:
+            mask &= table[:, i] == table[:, first[arg]]
+        else:
+            first[arg] = i
+    return table, mask
+
+def filter_table(args, table):
+    """
+        Rows of `table` that fit the domains of `args`, as a NumPy array.
+        If some arguments are not plain variables or constants, only the rows not matching the constants are removed.
+        The decompositions rely on this, they do not compare the constants themselves.
+    """
+    if get_bounds_array(args) is None:
+        table = np.asarray(table, dtype=int).reshape(-1, len(args))
+        mask = np.ones(len(table), dtype=bool)
+        for col, arg in enumerate(args):
+            if is_num(arg):
+                mask &= table[:, col] == arg
+        return table[mask]
+    table, mask = rows_in_bounds(args, table)
+    return table[mask]
+
+def compress_table(args, table):
+    """
+        Compress `table` into short tuples, where None is a wildcard matching any value in the domain of its argument.
+        For each column in turn, rows that agree on all other columns and cover the full domain of the column are merged.
+        Only used for plain variables, the table should be filtered on their domains first.
+    """
+    rows = set(map(tuple, np.asarray(table).tolist()))
+    for col, arg in enumerate(args):
+        domain = get_domain(arg)
+        if domain is None or len(domain) <= 1:
+            continue # too large to cover, or a wildcard does not make the row shorter
+        domain = set(domain)
+        groups = dict()
+        for row in rows:
+            groups.setdefault(row[:col] + row[col+1:], set()).add(row[col])
+        rows = set()
+        for key, values in groups.items():
+            if None in values or values >= domain:
+                rows.add(key[:col] + (None,) + key[col:])
+            else:
+                rows |= {key[:col] + (v,) + key[col:] for v in values}
+    return sorted(rows, key=lambda row: [(v is None, v or 0) for v in row])
+
+def table_sol(args):
+    vars, table = args
+    vars = list(vars)
+    if get_bounds_array(vars) is None:
+        return False, None
+    table, mask = rows_in_bounds(vars, table)
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return True, None
+    return True, [table[idx[0]].tolist(), args[1]]
+
+def negative_table_sol(args):
+    vars, table = args
+    vars = list(vars)
+    domains = get_domains(vars)
+    if not is_plain(vars) or domains is None:
+        return False, None
+    table, mask = rows_in_bounds(vars, table)
+    forbidden = set(map(tuple, table[mask].tolist()))
+
+    # only infeasible if the forbidden tuples cover the full domain product
+    if len(forbidden) >= np.prod([len(dom) for dom in domains], dtype=object):
+        return True, None
+    # at most len(forbidden)+1 tuples need to be enumerated
+    for tup in itertools.product(*domains):
+        if tup not in forbidden:
+            return True, [list(tup), args[1]]
+
+def regular_sol(args):
+    array, transitions, start, accepting = args
+    array = list(array)
+    if not is_plain(array):
+        return False, None
+
+    nodes = sorted({s for s, _, _ in transitions} | {e for _, _, e in transitions} | {start}, key=str)
+    node_map = {n: i for i, n in enumerate(nodes)}
+    src = np.array([node_map[s] for s, _, _ in transitions], dtype=int)
+    val = np.array([v for _, v, _ in transitions], dtype=int)
+    dst = np.array([node_map[e] for _, _, e in transitions], dtype=int)
+
+    # forward reachability, reached[k] is the set of nodes reachable after reading k symbols
+    lbs, ubs = get_bounds_array(array)
+    reached = [np.zeros(len(nodes), dtype=bool)]
+    reached[0][node_map[start]] = True
+    used = [] # for each position, the transitions that can be taken from a reachable node
+    for lb, ub in zip(lbs, ubs):
+        tmask = reached[-1][src] & (val >= lb) & (val <= ub)
+        nxt = np.zeros(len(nodes), dtype=bool)
+        nxt[dst[tmask]] = True
+        reached.append(nxt)
+        used.append(tmask)
+
+    final = [node_map[a] for a in accepting if a in node_map and reached[-1][node_map[a]]]
+    if len(final) == 0:
+        return True, None
+
+    # backtrack a witness from a reachable accepting node
+    word = [None] * len(array)
+    node = final[0]
+    for k in reversed(range(len(array))):
+        t = np.flatnonzero(used[k] & (dst == node))[0]
+        word[k], node = int(val[t]), src[t]
+    return True, [word, transitions, start, accepting]
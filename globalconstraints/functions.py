@@ -0,0 +1,179 @@
+import cpmpy as cp
+from cpmpy.expressions.core import Comparison
+
+from .superclass import AuxGlobal, NativeGlobal, CustomGlobal
+
+"""
+Half-reified variants of comparisons with a global function: Element, Minimum, Maximum and NValue.
+Global functions are not constraints themselves, so the comparison `func(...) <op> rhs` is wrapped as a global constraint,
+    with the arguments of the function followed by the comparison operator and the right-hand side as its arguments.
+"""
+
+def element_comparison(arr, idx, op, rhs):
+    return Comparison(op, cp.Element(arr, idx), rhs)
+
+def minimum_comparison(arr, op, rhs):
+    return Comparison(op, cp.Minimum(arr), rhs)
+
+def maximum_comparison(arr, op, rhs):
+    return Comparison(op, cp.Maximum(arr), rhs)
+
+def nvalue_comparison(arr, op, rhs):
+    return Comparison(op, cp.NValue(arr), rhs)
+
+def from_comparison(cls, cons):
+    """
+        Wrap the comparison `cons` between a global function and a right-hand side into an instance of `cls`.
+    """
+    func, rhs = cons.args
+    if isinstance(func, cp.Element):
+        return cls(*func.args, cons.name, rhs)
+    return cls(list(func.args), cons.name, rhs)
+
+
+class CustomElement(CustomGlobal):
+
+    def __init__(self, arr, idx, op, rhs, **kwargs):
+        super().__init__("element", (list(arr), idx, op, rhs), **kwargs)
+        self.name = "custom_element"
+
+        self.cpm_global = element_comparison
+
+class NativeElement(CustomElement, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_element"
+
+class ElementAuxHalfReif(AuxGlobal, CustomElement):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_element"
+
+        # replace everything but the operator
+        self.to_replace = [0, 1, 3]
+        self.cpm_global = element_comparison
+
+class ElementAuxHalfReifDummy(ElementAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_element_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
+
+
+class CustomMinimum(CustomGlobal):
+
+    def __init__(self, arr, op, rhs, **kwargs):
+        super().__init__("min", (list(arr), op, rhs), **kwargs)
+        self.name = "custom_min"
+
+        self.cpm_global = minimum_comparison
+
+class NativeMinimum(CustomMinimum, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_min"
+
+class MinimumAuxHalfReif(AuxGlobal, CustomMinimum):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_min"
+
+        # replace everything but the operator
+        self.to_replace = [0, 2]
+        self.cpm_global = minimum_comparison
+
+class MinimumAuxHalfReifDummy(MinimumAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_min_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
+
+
+class CustomMaximum(CustomGlobal):
+
+    def __init__(self, arr, op, rhs, **kwargs):
+        super().__init__("max", (list(arr), op, rhs), **kwargs)
+        self.name = "custom_max"
+
+        self.cpm_global = maximum_comparison
+
+class NativeMaximum(CustomMaximum, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_max"
+
+class MaximumAuxHalfReif(AuxGlobal, CustomMaximum):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_max"
+
+        # replace everything but the operator
+        self.to_replace = [0, 2]
+        self.cpm_global = maximum_comparison
+
+class MaximumAuxHalfReifDummy(MaximumAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_max_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
+
+
+class CustomNValue(CustomGlobal):
+
+    def __init__(self, arr, op, rhs, **kwargs):
+        super().__init__("nvalue", (list(arr), op, rhs), **kwargs)
+        self.name = "custom_nvalue"
+
+        self.cpm_global = nvalue_comparison
+
+class NativeNValue(CustomNValue, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_nvalue"
+
+class NValueAuxHalfReif(AuxGlobal, CustomNValue):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_nvalue"
+
+        # replace everything but the operator
+        self.to_replace = [0, 2]
+        self.cpm_global = nvalue_comparison
+
+class NValueAuxHalfReifDummy(NValueAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_nvalue_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
@@ -1,9 +1,11 @@
 import warnings
 
 import cpmpy as cp
+import numpy as np
 from cpmpy.expressions.utils import get_bounds, argval, argvals
 
 from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .matching import gcc_sol
 from cpmpy.solvers.solver_interface import ExitStatus
 
 
@@ -29,17 +31,28 @@ class BooleanDecomposedGCC(CustomGCC):
 
         vars, vals, occ = self.args
         lbs, ubs = get_bounds(vars)
+        lbs, ubs = np.array(lbs, dtype=int), np.array(ubs, dtype=int)
         lb, ub = min(lbs), max(ubs) + 1
-        self.val_range = list(range(lb, ub))
+        self.val_range = np.arange(lb, ub)
+        self.val_idx = {int(v): k for k, v in enumerate(self.val_range)}
         for v in vals:
             assert isinstance(v, int)
-        self.bv = cp.boolvar(shape=(len(vars), len(self.val_range)))
+        # only make indicators for values in the domain of each variable
+        self.in_domain = (lbs[:, None] <= self.val_range[None, :]) & (self.val_range[None, :] <= ubs[:, None])
+        self.bv = np.full(self.in_domain.shape, None, dtype=object)
+        self.bv[self.in_domain] = cp.boolvar(shape=(int(self.in_domain.sum()),))
+
+    def get_column(self, idx):
+        return cp.cpm_array(self.bv[self.in_domain[:, idx], idx])
 
     def toplevel(self):
         vars, vals, occ = self.args
-        defining = [cp.sum(row) == 1 for row in self.bv]  # each variable has exactly one value
-        defining += [cp.sum(bvs * self.val_range) == var for bvs, var in
-                     zip(self.bv, vars)]  # link bvs to values of vars
+        defining = []
+        for i, var in enumerate(vars):
+            idx = np.flatnonzero(self.in_domain[i])
+            bvs = cp.cpm_array(self.bv[i, idx])
+            defining.append(cp.sum(bvs) == 1) # each variable has exactly one value
+            defining.append(cp.sum(bvs * self.val_range[idx]) == var) # link bvs to values of vars
         return defining
 
     def iftrue(self):
@@ -47,13 +60,15 @@ class BooleanDecomposedGCC(CustomGCC):
         vars, vals, occ = self.args
         cons = []
         for val, cnt in zip(vals, occ):
-            idx = self.val_range.index(val)
-            cons += [cp.sum(self.bv[:, idx]) == cnt]  # count is correct
+            if val not in self.val_idx:
+                cons += [cnt == 0] # no variable can take this value
+                continue
+            cons += [cp.sum(self.get_column(self.val_idx[val])) == cnt]  # count is correct
 
         if self.closed:
             for idx, var_val in enumerate(self.val_range):
-                if var_val not in vals:
-                    cons += cp.sum(self.bv[:, idx]) == 0
+                if var_val not in vals and self.in_domain[:, idx].any():
+                    cons += [cp.sum(self.get_column(idx)) == 0]
 
         return cons
 
@@ -69,6 +84,15 @@ class GCCAuxHalfReif(AuxGlobal, CustomGCC):
         self.to_replace = [0, 2]
         self.cpm_global = cp.GlobalCardinalityCount
 
+    def find_sol(self):
+        return gcc_sol(self.args)
+
+    def get_aux_bounds(self, i):
+        # a value cannot occur more often than the number of variables
+        if i == 2:
+            return 0, len(self.args[0])
+        return None, None
+
 class GCCAuxHalfReifDummy(GCCAuxHalfReif):
 
     def __init__(self, *args, **kwargs):
@@ -82,12 +106,7 @@ class GCCAuxHalfReifDummy(GCCAuxHalfReif):
         if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-        assert len(self.sol)  == len(self.new_args)
-        lst = []
-        for i, (arg, s) in enumerate(zip(self.new_args, self.sol)):
-            if i in self.to_replace:
-                lst.append(arg == s)
-        return flatlist(lst)
+        return self.fix_to_sol()
 
 
 class GCCAuxHalfReifMinimal(AuxGlobal, CustomGCC):
@@ -96,7 +115,10 @@ class GCCAuxHalfReifMinimal(AuxGlobal, CustomGCC):
         super().__init__(*args, **kwargs)
         self.name = "aux_gcc_minimal"
         self.to_replace = [2]
-        # self.cpm_global = cp.GlobalCardinalityCount
+        self.cpm_global = cp.GlobalCardinalityCount
+
+    def find_sol(self):
+        return gcc_sol(self.args)
 
     def get_aux_vars(self):
         vars, vals, occ = self.args
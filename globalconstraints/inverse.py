@@ -2,6 +2,7 @@ import cpmpy as cp
 from cpmpy.expressions.utils import get_bounds, all_pairs
 
 from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .matching import inverse_sol
 
 
 class CustomInverse(CustomGlobal, cp.Inverse):
@@ -45,15 +46,13 @@ class InverseAuxHalfReif(AuxGlobal, CustomInverse):
         self.to_replace = [0,1]
         self.cpm_global = cp.Inverse
 
+    def find_sol(self):
+        return inverse_sol(self.args)
+
 class InverseAuxHalfReifDummy(InverseAuxHalfReif):
 
     def iffalse(self):
         if self.sol is None:
             return []
-        assert len(self.sol)  == len(self.new_args)
-        lst = []
-        for i, (arg, s) in enumerate(zip(self.new_args, self.sol)):
-            if i in self.to_replace:
-                lst.append(arg == s)
-        return flatlist(lst)
+        return self.fix_to_sol()
 
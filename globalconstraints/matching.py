@@ -0,0 +1,160 @@
+"""
+    Solver-free feasibility checks for the global constraints whose satisfiability over bare domains
+        reduces to a bipartite matching or flow problem.
+
+    Each function returns a tuple (decided, sol):
+        - decided is False when the arguments are not plain variables or constants, the caller should use a solver
+        - sol is a witness in the same shape as `argvals(args)`, or None if the constraint is infeasible
+"""
+from collections import defaultdict, deque
+
+from cpmpy.expressions.utils import is_num
+from cpmpy.expressions.variables import _NumVarImpl, NegBoolView
+
+
+# larger domains are not enumerated, the caller should use a solver instead
+MAX_DOMAIN_SIZE = 10000
+
+def get_plain_bounds(arg):
+    """
+        Bounds of a plain variable or constant, None for any other expression.
+    """
+    if is_num(arg):
+        return int(arg), int(arg)
+    if isinstance(arg, _NumVarImpl) and not isinstance(arg, NegBoolView):
+        return int(arg.lb), int(arg.ub)
+    return None
+
+def get_domain(arg):
+    """
+        Domain of a plain variable or constant.
+        None for any other expression, or if the domain has more than `MAX_DOMAIN_SIZE` values.
+    """
+    bounds = get_plain_bounds(arg)
+    if bounds is None or bounds[1] - bounds[0] + 1 > MAX_DOMAIN_SIZE:
+        return None
+    return list(range(bounds[0], bounds[1] + 1))
+
+def is_plain(args):
+    """
+        Check if all arguments are plain variables or constants, and no variable occurs twice.
+    """
+    vars = [a for a in args if not is_num(a)]
+    return all(get_plain_bounds(a) is not None for a in args) and len(set(vars)) == len(vars)
+
+def get_domains(args):
+    """
+        Domains of plain variables or constants, None if any of them cannot be enumerated.
+    """
+    domains = [get_domain(a) for a in args]
+    if any(dom is None for dom in domains):
+        return None
+    return domains
+
+def assign_with_capacities(domains, lower, upper):
+    """
+        Assign each index to a value in its domain, such that value v is assigned between lower[v] and upper[v] times.
+        Values not in `upper` can be assigned arbitrarily often.
+
+        Augmenting-path max-flow (BFS, so no recursion limits), first up to the lower bounds, then up to the upper bounds.
+        Augmenting paths never decrease the load of a value, so lower bounds stay satisfied in the second phase.
+        Returns the list of assigned values, or None if no such assignment exists.
+    """
+    assigned = [None] * len(domains)
+    holders = defaultdict(set)
+    load = defaultdict(int)
+
+    def assign(i, v):
+        if assigned[i] is not None:
+            holders[assigned[i]].remove(i)
+            load[assigned[i]] -= 1
+        assigned[i] = v
+        holders[v].add(i)
+        load[v] += 1
+
+    def augment(i, cap):
+        reached_from = dict() # value -> index it was reached from
+        queue, seen = deque([i]), {i}
+        while len(queue):
+            k = queue.popleft()
+            for v in domains[k]:
+                if v in reached_from:
+                    continue
+                reached_from[v] = k
+                if load[v] < cap(v):
+                    # flip the assignments along the augmenting path
+                    while True:
+                        k = reached_from[v]
+                        v, old = assigned[k], v
+                        assign(k, old)
+                        if k == i:
+                            return True
+                for j in holders[v] - seen:
+                    seen.add(j)
+                    queue.append(j)
+        return False
+
+    if len(lower):
+        for i in range(len(domains)):
+            if assigned[i] is None:
+                augment(i, lambda v: lower.get(v, 0))
+        if any(load[v] < lo for v, lo in lower.items()):
+            return None
+
+    for i in range(len(domains)):
+        if assigned[i] is None and not augment(i, lambda v: upper.get(v, len(domains))):
+            return None
+    return assigned
+
+def alldifferent_sol(args):
+    domains = get_domains(args)
+    if not is_plain(args) or domains is None:
+        return False, None
+    values = set(v for dom in domains for v in dom)
+    return True, assign_with_capacities(domains, dict(), {v: 1 for v in values})
+
+def alldifferent_except_n_sol(args):
+    vars, except_vals = args
+    domains = get_domains(vars)
+    if not is_plain(list(vars)) or domains is None or not all(is_num(v) for v in except_vals):
+        return False, None
+    values = set(v for dom in domains for v in dom) - set(except_vals)
+    assigned = assign_with_capacities(domains, dict(), {v: 1 for v in values})
+    if assigned is None:
+        return True, None
+    return True, [assigned, list(except_vals)]
+
+def gcc_sol(args):
+    vars, vals, occ = args
+    if not is_plain(list(vars) + list(occ)) or len(set(vals)) != len(vals):
+        return False, None
+    domains = get_domains(vars)
+    if domains is None:
+        return False, None
+    occ_domains = [get_plain_bounds(o) for o in occ]
+    lower = {v: max(min(dom), 0) for v, dom in zip(vals, occ_domains)}
+    upper = {v: max(dom) for v, dom in zip(vals, occ_domains)}
+    assigned = assign_with_capacities(domains, lower, upper)
+    if assigned is None:
+        return True, None
+    return True, [assigned, list(vals), [assigned.count(v) for v in vals]]
+
+def inverse_sol(args):
+    fwd, rev = args
+    # a variable in both arrays would be assigned twice
+    if not is_plain(list(fwd) + list(rev)):
+        return False, None
+    fwd_domains, rev_domains = get_domains(fwd), get_domains(rev)
+    if fwd_domains is None or rev_domains is None:
+        return False, None
+    n = len(fwd)
+    rev_domains = [set(dom) for dom in rev_domains]
+    # fwd[i] = j is only possible if rev[j] = i is possible as well
+    domains = [[j for j in dom if 0 <= j < n and i in rev_domains[j]] for i, dom in enumerate(fwd_domains)]
+    assigned = assign_with_capacities(domains, dict(), {j: 1 for j in range(n)})
+    if assigned is None:
+        return True, None
+    inv = [None] * n
+    for i, j in enumerate(assigned):
+        inv[j] = i
+    return True, [assigned, inv]
@@ -2,6 +2,8 @@ import cpmpy as cp
 from cpmpy.expressions.utils import get_bounds, all_pairs
 
 from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .extensional import negative_table_sol
+from .table import get_rows, match_row
 from cpmpy.solvers.solver_interface import ExitStatus
 
 class CustomNegativeTable(CustomGlobal, cp.NegativeTable):
@@ -10,6 +12,8 @@ class CustomNegativeTable(CustomGlobal, cp.NegativeTable):
         super().__init__(*args, **kwargs)
         self.name = "custom_negtable"
 
+        self.cpm_global = cp.NegativeTable
+
 class NativeNegativeTable(CustomNegativeTable, NativeGlobal):
 
     def __init__(self, *args, **kwargs):
@@ -18,20 +22,38 @@ class NativeNegativeTable(CustomNegativeTable, NativeGlobal):
 
 class DecomposedNegativeTable(CustomNegativeTable, cp.NegativeTable):
 
+    # set to True in subclasses to decompose over short tuples
+    compress = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = "decomposed_negtable"
         vars, table = self.args
-        self.row_is_sat = cp.boolvar(shape=(len(table),))
+        self.rows = get_rows(list(vars), table, compress=self.compress)
+        self.row_is_sat = cp.boolvar(shape=(len(self.rows),))
 
     def toplevel(self):
         vars, table = self.args
-        vars = cp.cpm_array(vars)
-        return [cp.all(row == vars).implies(self.row_is_sat[i]) for i, row in enumerate(table)]
+        return [match_row(list(vars), row).implies(self.row_is_sat[i]) for i, row in enumerate(self.rows)]
 
     def iftrue(self):
+        if len(self.rows) == 0:
+            return []
         return [~cp.any(self.row_is_sat)]
 
+    def iffalse(self):
+        return []
+
+class DecomposedCompressedNegativeTable(DecomposedNegativeTable):
+    """
+        Decomposition over the forbidden tuples compressed into short tuples, with a wildcard for arguments that can take any value.
+    """
+    compress = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "decomposed_compressed_negtable"
+
 class NegativeTableAuxHalfReif(AuxGlobal, CustomNegativeTable):
 
     def __init__(self, *args, **kwargs):
@@ -41,13 +63,16 @@ class NegativeTableAuxHalfReif(AuxGlobal, CustomNegativeTable):
         self.cpm_global = cp.NegativeTable
         self.to_replace = [0]
 
+    def find_sol(self):
+        return negative_table_sol(self.args)
+
 class NegativeTableAuxHalfReifDummy(NegativeTableAuxHalfReif):
 
     def iffalse(self):
         if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-        return [cp.all(cp.cpm_array(self.args[0]) == self.sol)]
+        return self.fix_to_sol()
 
 NegativeTableAuxHalfReifMinimal = NegativeTableAuxHalfReif
 NegativeTableAuxHalfReifMinimalDummy = NegativeTableAuxHalfReifDummy
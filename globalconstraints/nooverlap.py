@@ -1,7 +1,33 @@
 import cpmpy as cp
 from cpmpy.expressions.utils import get_bounds, all_pairs
 
-from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal, solver_supports
+from .matching import get_plain_bounds, is_plain
+
+def nooverlap_sol(args):
+    """
+        Greedily schedule the jobs in order of their latest start, each as early as possible with its shortest duration.
+        Only decides feasible instances, returns (False, None) if the greedy schedule fails.
+    """
+    start, dur, end = args
+    start, dur = list(start), list(dur)
+    if not is_plain(start + dur): # also rejects variables occurring multiple times
+        return False, None
+
+    sol_start, sol_dur = [None] * len(start), [max(get_plain_bounds(d)[0], 0) for d in dur]
+    if any(d > get_plain_bounds(arg)[1] for d, arg in zip(sol_dur, dur)):
+        return True, None # negative durations
+    time = None
+    for i in sorted(range(len(start)), key=lambda i: get_plain_bounds(start[i])[::-1]):
+        lb, ub = get_plain_bounds(start[i])
+        if sol_dur[i] == 0: # jobs without duration do not overlap
+            sol_start[i] = lb
+            continue
+        sol_start[i] = lb if time is None else max(lb, time)
+        if sol_start[i] > ub:
+            return False, None
+        time = sol_start[i] + sol_dur[i]
+    return True, [sol_start, sol_dur, None]
 
 class CustomNoOverlap(CustomGlobal, cp.NoOverlap):
 
@@ -9,10 +35,12 @@ class CustomNoOverlap(CustomGlobal, cp.NoOverlap):
         super().__init__(*args, **kwargs)
         self.name = "custom_nooverlap"
 
-        assert self.args[2] is None, "end should be None after refactoring, are you on the `no_end_cumulative` branch of CPMpy?"
+        if len(self.args) == 2: # CPMpy drops `end` from the arguments if it is None
+            self.update_args(list(self.args) + [None])
+        assert self.args[2] is None, "end is not supported, post the end times as separate constraints"
         self.cpm_global = cp.NoOverlap
 
-class NativeNoOverlap(AuxGlobal, NativeGlobal):
+class NativeNoOverlap(CustomNoOverlap, NativeGlobal):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -31,11 +59,32 @@ class BinaryDecomposedNoOverlap(CustomNoOverlap):
         dur = list(dur)
         njobs = len(start)
 
-        cons = []
+        dur_bounds = [get_bounds(d) for d in dur]
+        cons = [d >= 0 for d, (dlb, _) in zip(dur, dur_bounds) if dlb < 0]
 
         end = [start[i] + dur[i] for i in range(njobs)]
+        start_bounds = [get_bounds(s) for s in start]
+        end_bounds = [get_bounds(e) for e in end]
         for i,j in all_pairs(list(range(len(start)))):
-            cons.append((end[i] <= start[j]) | (end[j] <= start[i]))
+            if dur_bounds[i][1] <= 0 or dur_bounds[j][1] <= 0:
+                continue # jobs without duration never overlap
+            # jobs which may have no duration do not need to be ordered
+            empty = [dur[k] == 0 for k in (i,j) if dur_bounds[k][0] <= 0]
+            # under the current bounds, can job i end before job j starts, and vice versa?
+            i_before_j = end_bounds[i][0] <= start_bounds[j][1]
+            j_before_i = end_bounds[j][0] <= start_bounds[i][1]
+            if end_bounds[i][1] <= start_bounds[j][0] or end_bounds[j][1] <= start_bounds[i][0]:
+                continue # windows are disjoint, jobs can never overlap
+            elif i_before_j and j_before_i:
+                cons.append(cp.any(empty + [end[i] <= start[j], end[j] <= start[i]]))
+            elif i_before_j: # jobs are ordered, no disjunction needed
+                cons.append(cp.any(empty + [end[i] <= start[j]]))
+            elif j_before_i:
+                cons.append(cp.any(empty + [end[j] <= start[i]]))
+            elif len(empty) > 0:
+                cons.append(cp.any(empty))
+            else:
+                return [cp.BoolVal(False)]
     
         return cons
 
@@ -51,6 +100,10 @@ class NoOverlapAuxHalfReif(AuxGlobal, CustomNoOverlap):
         self.name = "aux_nooverlap"
 
         self.to_replace = [0,1]
+        self.cpm_global = cp.NoOverlap
+
+    def find_sol(self):
+        return nooverlap_sol(self.args)
 
 class NoOverlapAuxHalfReifDummy(NoOverlapAuxHalfReif):
 
@@ -58,10 +111,45 @@ class NoOverlapAuxHalfReifDummy(NoOverlapAuxHalfReif):
         if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-        self.check_if_sat()
-        if self.sol is None:
-            return []
+        return self.fix_to_sol()
+
+class NoOverlapOptionalHalfReif(CustomNoOverlap):
+    """
+        Half-reification using the indicator as presence literal of all tasks:
+            bv -> NoOverlap(start, dur) becomes NoOverlapOptional(start, dur, is_present=[bv,...,bv])
+        Only for solvers supporting optional intervals natively, otherwise falls back to the auxiliary reformulation.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "optional_nooverlap"
+
+    def use_optional(self):
+        return solver_supports(self.solver_kwargs.get("solver"), "no_overlap_optional")
 
-        new_start, new_dur = self.new_args
-        return flatlist([cp.cpm_array(new_start) == self.sol[0],
-                         cp.cpm_array(new_dur) == self.sol[1]])
\ No newline at end of file
+    def get_fallback(self):
+        """
+            The auxiliary reformulation of the same arguments, used for solvers without optional intervals.
+        """
+        if not hasattr(self, "fallback"):
+            self.fallback = NoOverlapAuxHalfReif(*self.args)
+            self.fallback.solver_kwargs = self.solver_kwargs
+            self.fallback.deadline = getattr(self, "deadline", None)
+        return self.fallback
+
+    def toplevel(self):
+        if not self.use_optional():
+            return self.get_fallback().toplevel()
+        start, dur, end = self.args
+        bv = self.get_indicator()
+        return [cp.NoOverlapOptional(list(start), list(dur), is_present=[bv] * len(start))]
+
+    def iftrue(self):
+        if not self.use_optional():
+            return self.get_fallback().iftrue()
+        return []
+
+    def iffalse(self):
+        if not self.use_optional():
+            return self.get_fallback().iffalse()
+        return []
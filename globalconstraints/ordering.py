@@ -0,0 +1,153 @@
+import cpmpy as cp
+
+from .superclass import AuxGlobal, NativeGlobal, CustomGlobal
+from .matching import get_plain_bounds, is_plain
+
+"""
+Half-reified variants of the constraints on the order of values in a sequence: Increasing, Decreasing and AllEqual.
+Their feasibility over bare domains is decided greedily, with the same convention as the checks in `matching.py`.
+"""
+
+def increasing_sol(args):
+    if not is_plain(args):
+        return False, None
+    sol, prev = [], None
+    for arg in args:
+        lb, ub = get_plain_bounds(arg)
+        val = lb if prev is None else max(lb, prev)
+        if val > ub:
+            return True, None
+        sol.append(val)
+        prev = val
+    return True, sol
+
+def decreasing_sol(args):
+    decided, sol = increasing_sol(list(reversed(args)))
+    if sol is None:
+        return decided, None
+    return True, list(reversed(sol))
+
+def allequal_sol(args):
+    if not is_plain(args):
+        return False, None
+    lb = max(get_plain_bounds(a)[0] for a in args)
+    ub = min(get_plain_bounds(a)[1] for a in args)
+    if lb > ub:
+        return True, None
+    return True, [lb] * len(args)
+
+class CustomIncreasing(CustomGlobal, cp.Increasing):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "custom_increasing"
+
+        self.cpm_global = cp.Increasing
+
+class NativeIncreasing(CustomIncreasing, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_increasing"
+
+class IncreasingAuxHalfReif(AuxGlobal, CustomIncreasing):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_increasing"
+
+        self.to_replace = list(range(len(self.args)))
+        self.cpm_global = cp.Increasing
+
+    def find_sol(self):
+        return increasing_sol(list(self.args))
+
+class IncreasingAuxHalfReifDummy(IncreasingAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_increasing_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
+
+
+class CustomDecreasing(CustomGlobal, cp.Decreasing):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "custom_decreasing"
+
+        self.cpm_global = cp.Decreasing
+
+class NativeDecreasing(CustomDecreasing, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_decreasing"
+
+class DecreasingAuxHalfReif(AuxGlobal, CustomDecreasing):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_decreasing"
+
+        self.to_replace = list(range(len(self.args)))
+        self.cpm_global = cp.Decreasing
+
+    def find_sol(self):
+        return decreasing_sol(list(self.args))
+
+class DecreasingAuxHalfReifDummy(DecreasingAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_decreasing_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
+
+
+class CustomAllEqual(CustomGlobal, cp.AllEqual):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "custom_allequal"
+
+        self.cpm_global = cp.AllEqual
+
+class NativeAllEqual(CustomAllEqual, NativeGlobal):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "native_allequal"
+
+class AllEqualAuxHalfReif(AuxGlobal, CustomAllEqual):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_allequal"
+
+        self.to_replace = list(range(len(self.args)))
+        self.cpm_global = cp.AllEqual
+
+    def find_sol(self):
+        return allequal_sol(list(self.args))
+
+class AllEqualAuxHalfReifDummy(AllEqualAuxHalfReif):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "aux_allequal_dummy"
+
+    def iffalse(self):
+        if not hasattr(self, "sol"): self.check_if_sat()
+        if self.sol is None:
+            return []
+        return self.fix_to_sol()
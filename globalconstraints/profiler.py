@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+
+class Profiler:
+    """
+        Profiler with named spans, used to time the phases of initializing a solver.
+
+        Time spent in a nested span is only counted for the innermost span,
+            so the totals of all spans add up to the total profiled time.
+        Spans with the same name are aggregated, e.g., `iftrue[aux_table]` sums over all AuxTable constraints.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.totals = dict()
+        self.stack = [] # time spent in child spans, for each open span
+
+    @contextmanager
+    def span(self, name):
+        self.stack.append(0)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            children = self.stack.pop()
+            self.totals[name] = self.totals.get(name, 0) + elapsed - children
+            if len(self.stack):
+                self.stack[-1] += elapsed
+
+    def wrap(self, name, func):
+        """
+            Wrap `func` so each call is profiled in span `name`.
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def profile(self, name):
+        """
+            Decorator profiling each call of a function in span `name`.
+        """
+        return lambda func: self.wrap(name, func)
+
+    def summary(self, prefix="phase:"):
+        """
+            Totals of all spans, to be merged into a result row.
+            The prefix avoids the keys being counted as total time when plotting.
+        """
+        return {prefix + name : total for name, total in self.totals.items()}
+
+
+# profiler used by the global constraints and `init_solver_with_search_order`
+profiler = Profiler()
@@ -1,15 +1,20 @@
+from functools import lru_cache
+
 import cpmpy as cp
 from cpmpy.expressions.utils import get_bounds, all_pairs
 
 from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .extensional import regular_sol
 from cpmpy.solvers.solver_interface import ExitStatus
 
 class CustomRegular(CustomGlobal, cp.Regular):
 
     def __init__(self, *args, **kwargs):
-        super.__init__(*args, **kwargs)
+        super().__init__(*args, **kwargs)
         self.name = "custom_regular"
 
+        self.cpm_global = cp.Regular
+
 class NativeRegular(CustomRegular, NativeGlobal):
 
     def __init__(self, *args, **kwargs):
@@ -32,6 +37,54 @@ class DecomposedRegular(CustomRegular, cp.Regular):
     def toplevel(self):
         return self.defining
 
+    def iffalse(self):
+        return []
+
+@lru_cache(maxsize=None)
+def bypass_automaton(transitions, start, accepting, lb, ub):
+    """
+        Automaton accepting [1] + w for every word w accepted by the given automaton,
+            and [0] + w for every word w over the alphabet lb..ub.
+        Nodes are renumbered to integers, the new start node reads the indicator and the bypass node is absorbing.
+        Cached, as the same automaton is often used in many constraints.
+    """
+    nodes = sorted({s for s, _, _ in transitions} | {e for _, _, e in transitions} | {start}, key=str)
+    node_map = {n: i for i, n in enumerate(nodes)}
+    new_start, bypass = len(nodes), len(nodes) + 1
+
+    new_transitions = [(node_map[s], v, node_map[e]) for s, v, e in transitions]
+    new_transitions += [(new_start, 1, node_map[start]), (new_start, 0, bypass)]
+    new_transitions += [(bypass, v, bypass) for v in range(lb, ub + 1)]
+    new_accepting = [node_map[a] for a in accepting if a in node_map] + [bypass]
+    return new_transitions, new_start, new_accepting
+
+class RegularIndicatorHalfReif(CustomRegular):
+    """
+        Half-reification without auxiliary variables, by reading the indicator first:
+            bv -> Regular(x, ...) becomes Regular([bv] + x, ...) over an automaton with an absorbing bypass node,
+            only reachable when bv = 0.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "indicator_regular"
+
+    def toplevel(self):
+        array, transitions, start, accepting = self.args
+        bv = self.get_indicator()
+
+        lbs, ubs = get_bounds(array)
+        lb, ub = (int(min(lbs)), int(max(ubs))) if len(array) else (0, -1)
+        new_transitions, new_start, new_accepting = bypass_automaton(tuple((s, int(v), e) for s, v, e in transitions),
+                                                                     start, tuple(accepting), lb, ub)
+        return [cp.Regular([bv] + list(array), new_transitions, new_start, new_accepting)]
+
+    def iftrue(self):
+        return []
+
+    def iffalse(self):
+        return []
+
 class RegularAuxHalfReif(AuxGlobal, CustomRegular):
 
     def __init__(self, *args, **kwargs):
@@ -41,13 +94,21 @@ class RegularAuxHalfReif(AuxGlobal, CustomRegular):
         self.cpm_global = cp.Regular
         self.to_replace = [0]
 
+    def find_sol(self):
+        return regular_sol(self.args)
+
+    def get_aux_bounds(self, i):
+        # the auxiliary variables can only take values in the alphabet of the automaton
+        alphabet = [v for _, v, _ in self.args[1]]
+        return min(alphabet), max(alphabet)
+
 class RegularAuxHalfReifDummy(RegularAuxHalfReif):
 
     def iffalse(self):
         if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-        return [cp.all(cp.cpm_array(self.args[0]) == self.sol)]
+        return self.fix_to_sol()
 
 RegularAuxHalfReifMinimal = RegularAuxHalfReif
 
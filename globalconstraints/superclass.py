@@ -1,3 +1,7 @@
+from multiprocessing import Pool, TimeoutError as PoolTimeoutError
+from inspect import signature
+from time import time
+
 from cpmpy.expressions.globalconstraints import GlobalConstraint
 from cpmpy.solvers.solver_interface import ExitStatus
 
@@ -5,6 +9,22 @@ import cpmpy as cp
 from cpmpy.expressions.utils import argvals, flatlist, is_any_list, is_num, get_bounds
 from cpmpy.expressions.variables import _BoolVarImpl, _NumVarImpl
 
+from .cache import sat_cache
+from .deadline import Deadline, limit_time
+from .profiler import profiler
+
+def solver_supports(solver, name):
+    """
+        Check if `solver` supports the global constraint `name` natively, False if unknown.
+    """
+    if solver is None:
+        return False
+    try:
+        solver_cls = cp.SolverLookup.lookup(solver)
+    except ValueError:
+        return False
+    return name in getattr(solver_cls, "supported_global_constraints", frozenset())
+
 class CustomGlobal(GlobalConstraint):
 
     def __init__(self, *args, **kwargs):
@@ -22,6 +42,15 @@ class CustomGlobal(GlobalConstraint):
     def iffalse(self):
         raise NotImplementedError()
 
+    def get_indicator(self):
+        """
+            The Boolean variable half-reifying this global, set by `decompose_globals`.
+            Only needed by reformulations posting the indicator inside a top-level constraint.
+        """
+        if getattr(self, "indicator", None) is None:
+            raise ValueError(f"{self} needs its indicator, use `decompose_globals` to rewrite bv -> {self.name}")
+        return self.indicator
+
 class NativeGlobal(CustomGlobal):
 
     def __init__(self, *args, **kwargs):
@@ -48,20 +77,55 @@ class AuxGlobal(CustomGlobal):
         self.to_replace = list(range(len(self.args)))
         self.cpm_global = None
 
-    def make_new_vars(self, expr):
+        # auxiliary variables shared with other globals, see `share_aux_vars`
+        self.shared_aux = None
+        self.reused = set()
+        # identical global (under another indicator) whose auxiliary variables and toplevel constraint are re-used
+        self.copy_of = None
+
+        # deadline shared with the other globals and the final solve call, see `decompose_globals`
+        self.deadline = None
+
+    def make_new_vars(self, expr, lb=None, ub=None):
+        """
+            Make auxiliary variables for `expr`, constants are kept as is.
+            The bounds of the new variables are tightened to `lb` and `ub` if given (per element for lists).
+        """
         if is_any_list(expr):
-            return [self.make_new_vars(e) for e in expr]
+            lbs = lb if is_any_list(lb) else [lb] * len(expr)
+            ubs = ub if is_any_list(ub) else [ub] * len(expr)
+            return [self.make_new_vars(e, l, u) for e, l, u in zip(expr, lbs, ubs)]
+        if is_num(expr):
+            return expr
+        if self.shared_aux is not None and expr in self.shared_aux:
+            # already copied by a global with the same indicator, which also channels it
+            self.reused.add(self.shared_aux[expr])
+            return self.shared_aux[expr]
+
         if isinstance(expr, _BoolVarImpl):
-            return cp.boolvar()
-        if isinstance(expr, _NumVarImpl) or is_num(expr):
-            return cp.intvar(*get_bounds(expr))
-        raise ValueError(f"Unexpected expression to make a new variable for: {expr}")
+            new_var = cp.boolvar()
+        elif isinstance(expr, _NumVarImpl):
+            elb, eub = get_bounds(expr)
+            new_var = cp.intvar(elb if lb is None else max(elb, lb), eub if ub is None else min(eub, ub))
+        else:
+            raise ValueError(f"Unexpected expression to make a new variable for: {expr}")
+
+        if self.shared_aux is not None:
+            self.shared_aux[expr] = new_var
+        return new_var
+
+    def get_aux_bounds(self, i):
+        """
+            Bounds for the auxiliary variables of the i'th argument, override this to tighten them for a specific global.
+            Only called when the global is feasible.
+        """
+        return None, None
 
     def get_aux_vars(self):
         aux_vars = []
         for i, arg in enumerate(self.args):
             if i in self.to_replace:
-                new_arg = self.make_new_vars(arg)
+                new_arg = self.make_new_vars(arg, *self.get_aux_bounds(i))
                 if is_any_list(arg):
                     new_arg = cp.cpm_array(new_arg)
                 aux_vars.append(new_arg)
@@ -69,23 +133,91 @@ class AuxGlobal(CustomGlobal):
                 aux_vars.append(None) # None will fail in CPMpy, so it's a safe placeholder
         return aux_vars
 
-    def check_if_sat(self):
+    def channel(self, new_arg, arg):
+        """
+            Equalities between the auxiliary variables `new_arg` and `arg`.
+            Constants are not replaced by auxiliary variables, so need no equality.
+        """
+        return [new == old for new, old in zip(flatlist([new_arg]), flatlist([arg])) if not is_num(new)]
 
-        model = cp.Model(self.cpm_global(*self.args))
-        res = model.solve(**self.solver_kwargs)
-        if model.status().exitstatus == ExitStatus.UNKNOWN:
-            raise TimeoutError(f"Timeout during intialization of {self}")
-        if res is True:
-            self.sol = argvals(self.args)
+    def fix_to_sol(self):
+        """
+            Fix the auxiliary variables to the solution found by `check_if_sat`, used by the "DummySol" variants.
+        """
+        cons = []
+        for i in self.to_replace:
+            cons += self.channel(self.new_args[i], self.sol[i])
+        return cons
+
+    def get_witness(self):
+        """
+            The values of the variables in the replaced arguments in the solution found by `check_if_sat`.
+        """
+        return {var : val for i in self.to_replace
+                for var, val in zip(flatlist([self.args[i]]), flatlist([self.sol[i]])) if isinstance(var, _NumVarImpl)}
+
+    def get_aux_witness(self):
+        """
+            The values of the auxiliary variables in the solution found by `check_if_sat`.
+            These satisfy the global at the top-level, and are the values the "DummySol" variants fix them to.
+        """
+        return {var : val for i in self.to_replace
+                for var, val in zip(flatlist([self.new_args[i]]), flatlist([self.sol[i]])) if isinstance(var, _NumVarImpl)}
+
+    def find_sol(self):
+        """
+            Find a solution to the global constraint without calling a solver.
+            Returns a tuple (decided, sol), override this for globals with a polynomial-time feasibility check.
+        """
+        return False, None
+
+    def set_sol(self, sol, key=None):
+        """
+            Store the result of the feasibility check, and make the auxiliary variables if the global is feasible.
+            If `key` is given, the result is also stored in the cache.
+        """
+        self.sol = sol
+        if self.sol is not None:
             self.new_args = self.get_aux_vars()
-        else:
-            self.sol = None
+        if key is not None:
+            sat_cache.put(key, self.sol)
+
+    def check_without_solver(self):
+        """
+            Try to decide the feasibility of the global using the cache or `find_sol`.
+            Returns True if decided, in which case `self.sol` is set.
+        """
+        # structurally equal constraints were checked before, re-use the result
+        key = sat_cache.key(self.cpm_global, self.args)
+        found, sol = sat_cache.get(key) if key is not None else (False, None)
+        if found:
+            self.set_sol(sol)
+            return True
+
+        # some globals can be checked without calling a solver
+        decided, sol = self.find_sol()
+        if decided:
+            self.set_sol(sol, key=key)
+            return True
+        return False
+
+    def check_if_sat(self):
+        with profiler.span(f"check_if_sat[{self.name}]"):
+            if self.check_without_solver():
+                return
+
+            model = cp.Model(self.cpm_global(*self.args))
+            res = model.solve(**limit_time(self.solver_kwargs, self.deadline))
+            if model.status().exitstatus == ExitStatus.UNKNOWN:
+                raise TimeoutError(f"Timeout during intialization of {self}")
+            self.set_sol(argvals(self.args) if res is True else None,
+                         key=sat_cache.key(self.cpm_global, self.args))
 
     def toplevel(self):
         if not hasattr(self, "sol"): self.check_if_sat()
         if "aux" not in self.name:
             raise ValueError(f"{self} is not an AuxGlobal (maybe a decomposition?), you probably need to override this method.")
-        if self.sol is not None:
+        if self.sol is not None and self.copy_of is None:
             args = [self.new_args[i] if i  in self.to_replace else self.args[i] for i in range(len(self.args))]
             return self.cpm_global(*args)
         return []
@@ -99,8 +231,8 @@ class AuxGlobal(CustomGlobal):
         cons = []
         for i, arg in enumerate(self.args):
             if i in self.to_replace:
-                cons += [self.new_args[i] == arg]
-        return flatlist(cons)
+                cons += [c for c in self.channel(self.new_args[i], arg) if c.args[0] not in self.reused]
+        return cons
 
     def iffalse(self):
         if not hasattr(self, "sol"): self.check_if_sat()
@@ -108,3 +240,170 @@ class AuxGlobal(CustomGlobal):
             raise ValueError(f"{self} is not an AuxGlobal (maybe a decomposition?), you probably need to override this method.")
         # should be overloaded by "DummySol" variants
         return []
+
+
+@profiler.profile("check_if_sat_batch")
+def check_if_sat_batch(aux_globals, solver, deadline=None, **solver_kwargs):
+    """
+        Check the feasibility of all `aux_globals` using a single incremental solver.
+        Each global is posted guarded by its own indicator literal, and checked by solving under the assumption of it.
+        This way, solver construction and transformation overhead is only paid once.
+        Each check only gets the time remaining until `deadline`, if given.
+
+        Globals decided by the cache or `find_sol` are not posted to the solver.
+        If the solver does not support assumptions, each global is checked separately.
+    """
+    todo = [g for g in aux_globals if not hasattr(g, "sol") and not g.check_without_solver()]
+    if len(todo) == 0:
+        return
+
+    s = cp.SolverLookup.get(solver)
+    if "assumptions" not in signature(s.solve).parameters:
+        for g in todo:
+            g.check_if_sat()
+        return
+
+    indicators = [cp.boolvar() for _ in todo]
+    s += [ind.implies(g.cpm_global(*g.args)) for ind, g in zip(indicators, todo)]
+    for ind, g in zip(indicators, todo):
+        if g.check_without_solver(): # structurally equal to a global checked earlier in the batch
+            continue
+        res = s.solve(assumptions=[ind], **limit_time(solver_kwargs, deadline))
+        if s.status().exitstatus == ExitStatus.UNKNOWN:
+            raise TimeoutError(f"Timeout during intialization of {g}")
+        g.set_sol(argvals(g.args) if res is True else None, key=sat_cache.key(g.cpm_global, g.args))
+
+
+@profiler.profile("share_aux_vars")
+def share_aux_vars(implications):
+    """
+        Share the auxiliary copies of variables between AuxGlobal constraints.
+        `implications` is a list of (bv, global) tuples.
+
+        Globals of the same type over identical arguments share all their auxiliary variables, whatever their indicator.
+        Only the first one posts the global over them at the top-level, the copies only post their own channeling constraints.
+        This is the common case in Max-CSP, where every constraint has its own indicator.
+        Copies whose `iffalse` constrains the auxiliary variables (e.g., "DummySol" variants) are not shared this way,
+            as two different indicators could then force the original variables to the witness.
+
+        The auxiliary variables of the first one are then not shared with other globals, as the copies channel all of them.
+
+        The remaining globals share copies of their common variables with the globals guarded by the same indicator.
+        Sharing is only sound if the globals are jointly satisfiable over the shared copies when the indicator is false.
+        So a global only joins the group if its witness agrees with those of the globals already sharing on their common variables,
+            or if a joint witness for the group and the global can be found with a solver.
+        The combined witnesses then satisfy all globals in the group.
+    """
+    firsts, copies = dict(), []
+    for bv, g in implications:
+        if type(g).get_aux_vars is not AuxGlobal.get_aux_vars or type(g).iffalse is not AuxGlobal.iffalse:
+            continue
+        key = sat_cache.key(g.cpm_global, g.args)
+        if key is None:
+            continue
+        key = (type(g), key, str(flatlist(g.args)))
+        if key in firsts:
+            g.copy_of = firsts[key]
+            copies.append(g)
+        else:
+            firsts[key] = g
+
+    copied = {id(g.copy_of) for g in copies}
+    groups = dict()
+    for bv, g in implications:
+        if g.copy_of is None and id(g) not in copied:
+            groups.setdefault(bv, []).append(g)
+
+    for bv, aux_globals in groups.items():
+        shared, values, members = dict(), dict(), [] # original variable -> auxiliary variable/witness value
+        for g in aux_globals:
+            if type(g).get_aux_vars is not AuxGlobal.get_aux_vars: # globals replacing something else than the arguments
+                continue
+            if not hasattr(g, "sol"): g.check_if_sat()
+            if g.sol is None:
+                continue
+
+            witness = g.get_witness()
+            if any(var in values and values[var] != val for var, val in witness.items()):
+                # try to find a joint witness for the group
+                model = cp.Model([h.cpm_global(*h.args) for h in members + [g]])
+                if model.solve(**limit_time(g.solver_kwargs, g.deadline)) is not True:
+                    continue
+                for h in members + [g]:
+                    h.sol = argvals(h.args)
+                values = dict()
+                for h in members:
+                    values.update(h.get_witness())
+                witness = g.get_witness()
+
+            values.update(witness)
+            members.append(g)
+            g.shared_aux, g.reused = shared, set()
+            g.new_args = g.get_aux_vars()
+
+    for g in copies:
+        first = g.copy_of
+        if not hasattr(first, "sol"): first.check_if_sat()
+        g.sol, g.reused = first.sol, set()
+        if g.sol is not None:
+            g.new_args = first.new_args
+
+def solve_global(task):
+    """
+        Check the feasibility of a global, used as task in `check_if_sat_parallel`.
+        `task` is a tuple (idx, cpm_global, args, solver_kwargs, end), the check only gets the time remaining until `end`.
+        `end` is a time.time() timestamp, as the clock of a Deadline is not shared between processes.
+        Returns a tuple (idx, timeout, sol), sol is None if the global is infeasible.
+    """
+    idx, cpm_global, args, solver_kwargs, end = task
+    if end is not None:
+        remaining = end - time()
+        if remaining <= 0: # started after the time budget was used up
+            return idx, True, None
+        time_limit = solver_kwargs.get("time_limit")
+        solver_kwargs = dict(solver_kwargs, time_limit=remaining if time_limit is None else min(time_limit, remaining))
+    model = cp.Model(cpm_global(*args))
+    res = model.solve(**solver_kwargs)
+    if model.status().exitstatus == ExitStatus.UNKNOWN:
+        return idx, True, None
+    return idx, False, argvals(args) if res is True else None
+
+@profiler.profile("check_if_sat_parallel")
+def check_if_sat_parallel(aux_globals, solver, n_workers, time_budget=None, **solver_kwargs):
+    """
+        Check the feasibility of all `aux_globals` concurrently, using a pool of `n_workers` worker processes.
+        Each worker gets a copy of the global, so solvers do not share any state.
+
+        Globals decided by the cache or `find_sol` are not sent to the pool,
+            and structurally equal globals are only checked once.
+        Each check only gets the time remaining of `time_budget`.
+        Raises a TimeoutError as soon as any check times out, or when all checks together take longer than `time_budget`.
+        The worker processes are then terminated, so no checks keep running during the actual solve.
+    """
+    groups = dict() # structurally equal globals, only the first one of each group is checked
+    for g in aux_globals:
+        if hasattr(g, "sol") or g.check_without_solver():
+            continue
+        key = sat_cache.key(g.cpm_global, g.args)
+        groups.setdefault(id(g) if key is None else key, []).append(g)
+    if len(groups) == 0:
+        return
+
+    groups = list(groups.values())
+    deadline = Deadline(time_budget)
+    end = None if time_budget is None else time() + time_budget
+    tasks = [(i, grp[0].cpm_global, grp[0].args, dict(solver=solver, **solver_kwargs), end)
+             for i, grp in enumerate(groups)]
+    pool = Pool(processes=n_workers)
+    try:
+        results = pool.imap_unordered(solve_global, tasks)
+        for _ in tasks:
+            i, timeout, sol = results.next(timeout=deadline.remaining())
+            if timeout:
+                raise TimeoutError(f"Timeout during intialization of {groups[i][0]}")
+            for g in groups[i]:
+                g.set_sol(sol, key=sat_cache.key(g.cpm_global, g.args))
+    except PoolTimeoutError:
+        raise TimeoutError(f"Time budget of {time_budget}s exceeded during initialization")
+    finally:
+        pool.terminate()
@@ -1,15 +1,38 @@
 import cpmpy as cp
-from cpmpy.expressions.utils import get_bounds, all_pairs
+import numpy as np
+from cpmpy.expressions.globalconstraints import STAR
+from cpmpy.expressions.utils import get_bounds, all_pairs, is_num
 
-from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal
+from .superclass import AuxGlobal, flatlist, NativeGlobal, CustomGlobal, solver_supports
+from .extensional import table_sol, rows_in_bounds, get_bounds_array, filter_table, compress_table
+from .matching import get_domain
 from cpmpy.solvers.solver_interface import ExitStatus
 
+def get_rows(args, table, compress=False):
+    """
+        Rows of `table` fitting the domains of `args`, compressed into short tuples if `compress` is True.
+    """
+    rows = filter_table(args, table)
+    if compress and get_bounds_array(args) is not None:
+        return compress_table(args, rows)
+    return rows.tolist()
+
+def match_row(args, row):
+    """
+        Constraint for `args` to be equal to `row`, wildcards (None) match any value.
+        Constants are not compared, as the rows are filtered on the domains of the arguments first.
+    """
+    cons = [arg == val for arg, val in zip(args, row) if val is not None and not is_num(arg)]
+    return cp.all(cons) if len(cons) else cp.BoolVal(True)
+
 class CustomTable(CustomGlobal, cp.Table):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = "custom_table"
 
+        self.cpm_global = cp.Table
+
 class NativeTable(CustomTable, NativeGlobal):
 
     def __init__(self, *args, **kwargs):
@@ -18,19 +41,74 @@ class NativeTable(CustomTable, NativeGlobal):
 
 class DecomposedTable(CustomTable, cp.Table):
 
+    # set to True in subclasses to decompose over short tuples
+    compress = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = "decomposed_table"
         vars, table = self.args
-        self.row_is_sat = cp.boolvar(shape=(len(table),))
+        self.rows = get_rows(list(vars), table, compress=self.compress)
+        self.row_is_sat = cp.boolvar(shape=(len(self.rows),))
 
     def iftrue(self):
+        if len(self.rows) == 0:
+            return [cp.BoolVal(False)]
         return [cp.any(self.row_is_sat)]
 
     def toplevel(self):
         vars, table = self.args
-        vars = cp.cpm_array(vars)
-        return [self.row_is_sat[i].implies(cp.all(row == vars)) for i,row in enumerate(table)]
+        return [self.row_is_sat[i].implies(match_row(list(vars), row)) for i,row in enumerate(self.rows)]
+
+    def iffalse(self):
+        return []
+
+class DecomposedCompressedTable(DecomposedTable):
+    """
+        Decomposition over the table compressed into short tuples, with a wildcard for arguments that can take any value.
+    """
+    compress = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "decomposed_compressed_table"
+
+
+class TableIndicatorHalfReif(CustomTable):
+    """
+        Half-reification without auxiliary variables, by adding the indicator as an extra column to the table:
+            bv -> Table(x, T) becomes Table(x + [bv], T x {1} U {(*,...,*,0)})
+
+        The wildcard row is posted as a ShortTable if the solver supports it natively.
+        Otherwise, it is expanded to all tuples in the domains of x, if there are at most `max_expanded_rows` of them.
+    """
+    max_expanded_rows = 100000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = "indicator_table"
+
+    def toplevel(self):
+        vars, table = self.args
+        vars = list(vars)
+        bv = self.get_indicator()
+
+        rows = filter_table(vars, table)
+        rows = np.hstack([rows, np.ones((len(rows), 1), dtype=int)])
+
+        domains = [get_domain(v) for v in vars]
+        if solver_supports(self.solver_kwargs.get("solver"), "short_table") or any(dom is None for dom in domains) \
+                or np.prod([len(dom) for dom in domains], dtype=object) > self.max_expanded_rows:
+            wildcard = [[STAR] * len(vars) + [0]]
+            return [cp.ShortTable(vars + [bv], np.vstack([rows.astype(object), np.array(wildcard, dtype=object)]))]
+
+        # expand the wildcard row, all combinations of values in the domains
+        expanded = np.array(np.meshgrid(*domains, indexing="ij"), dtype=int).reshape(len(vars), -1).T
+        expanded = np.hstack([expanded, np.zeros((len(expanded), 1), dtype=int)])
+        return [cp.Table(vars + [bv], np.vstack([rows, expanded]))]
+
+    def iftrue(self):
+        return []
 
     def iffalse(self):
         return []
@@ -45,6 +123,16 @@ class TableAuxHalfReif(AuxGlobal, CustomTable):
         self.cpm_global = cp.Table
         self.to_replace = [0]
 
+    def find_sol(self):
+        return table_sol(self.args)
+
+    def get_aux_bounds(self, i):
+        # the auxiliary variables can only take the values in the rows that fit the domains
+        vars, table = self.args
+        if get_bounds_array(list(vars)) is None:
+            return None, None
+        table, mask = rows_in_bounds(list(vars), table)
+        return table[mask].min(axis=0).tolist(), table[mask].max(axis=0).tolist()
 
 class TableAuxHalfReifDummy(TableAuxHalfReif):
 
@@ -56,7 +144,7 @@ class TableAuxHalfReifDummy(TableAuxHalfReif):
         if not hasattr(self, "sol"): self.check_if_sat()
         if self.sol is None:
             return []
-        return flatlist(cp.cpm_array(self.args[0]) == self.sol[0])
+        return self.fix_to_sol()
 
 
 
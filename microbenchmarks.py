@@ -0,0 +1,212 @@
+"""
+    Microbenchmarks for the reformulation layer in `globalconstraints`.
+
+    For every concrete class in `globalconstraints`, the generation of `toplevel()`, `iftrue()` and `iffalse()`
+        (and `check_if_sat()` for the auxiliary reformulations) is timed over increasing scope sizes.
+    The number of emitted constraints and variables is recorded as well, and compared against a stored baseline,
+        so a change making the generation of a reformulation quadratic is caught before running the full experiments.
+"""
+import inspect
+import json
+import math
+import random
+from os.path import exists
+from time import perf_counter
+
+import cpmpy as cp
+from cpmpy.expressions.utils import flatlist
+from cpmpy.transformations.get_variables import get_variables
+
+import globalconstraints
+from globalconstraints.functions import CustomElement, CustomMinimum, CustomMaximum, CustomNValue
+from globalconstraints.superclass import CustomGlobal, NativeGlobal, AuxGlobal
+from globalconstraints.cache import sat_cache
+
+METHODS = ["check_if_sat", "toplevel", "iftrue", "iffalse"]
+
+
+def get_classes():
+    """
+        All concrete reformulation classes in `globalconstraints`, i.e., excluding the Custom* base classes.
+    """
+    classes = [cls for _, cls in inspect.getmembers(globalconstraints, inspect.isclass)
+               if issubclass(cls, CustomGlobal) and cls not in (CustomGlobal, NativeGlobal, AuxGlobal)]
+    return sorted((cls for cls in classes if not cls.__name__.startswith("Custom")), key=lambda cls: cls.__name__)
+
+
+def make_args(cpm_global, n):
+    """
+        Arguments for a feasible instance of `cpm_global` with scope size `n`, seeded by `n`.
+        Returns None if there is no instance generator for the global.
+    """
+    rng = random.Random(n)
+    if issubclass(cpm_global, (CustomElement, CustomMinimum, CustomMaximum, CustomNValue)):
+        arr = list(cp.intvar(0, n - 1, shape=n, name="x"))
+        if issubclass(cpm_global, CustomElement):
+            return [arr, cp.intvar(0, n - 1, name="idx"), "==", cp.intvar(0, n - 1, name="y")]
+        return [arr, "<=", cp.intvar(0, n - 1, name="y")]
+    if issubclass(cpm_global, cp.AllDifferentExceptN):
+        return [cp.intvar(0, n // 2, shape=n, name="x"), [0]]
+    if issubclass(cpm_global, (cp.AllDifferent, cp.Circuit, cp.Increasing, cp.Decreasing, cp.AllEqual)):
+        return cp.intvar(0, n - 1, shape=n, name="x")
+    if issubclass(cpm_global, cp.GlobalCardinalityCount):
+        nvals = max(n // 4, 1)
+        return [cp.intvar(0, nvals, shape=n, name="x"), list(range(nvals)), cp.intvar(0, n, shape=nvals, name="occ")]
+    if issubclass(cpm_global, cp.Inverse):
+        return [cp.intvar(0, n - 1, shape=n, name="fwd"), cp.intvar(0, n - 1, shape=n, name="rev")]
+    if issubclass(cpm_global, (cp.Table, cp.NegativeTable)):
+        table = [[rng.randint(0, 4) for _ in range(n)] for _ in range(2 * n)]
+        return [cp.intvar(0, 4, shape=n, name="x"), table]
+    if issubclass(cpm_global, cp.Regular):
+        # no three consecutive 1's
+        transitions = [("a", 0, "a"), ("a", 1, "b"), ("b", 0, "a"), ("b", 1, "c"), ("c", 0, "a")]
+        return [cp.intvar(0, 1, shape=n, name="x"), transitions, "a", ["a", "b", "c"]]
+    if issubclass(cpm_global, (cp.Cumulative, cp.NoOverlap)):
+        start = cp.intvar(0, 5 * n, shape=n, name="start")
+        dur = [rng.randint(1, 5) for _ in range(n)]
+        if issubclass(cpm_global, cp.NoOverlap):
+            return [start, dur, None]
+        return [start, dur, None, [rng.randint(1, 3) for _ in range(n)], 4]
+    return None
+
+
+def count(cons, args, indicator):
+    """
+        Number of emitted constraints, and of variables in them which are not in the arguments or the indicator of the global.
+    """
+    cons = [c for c in flatlist([cons]) if c is not None]
+    arg_vars = set(get_variables(flatlist([a for a in args if not isinstance(a, str)])))
+    arg_vars.add(indicator)
+    return len(cons), len(set(get_variables(cons)) - arg_vars)
+
+
+def bench_class(cls, n, repeat=3, solver="ortools"):
+    """
+        Time the reformulation methods of `cls` on an instance with scope size `n`, best of `repeat` runs.
+        Each run uses a new instance, and the feasibility cache is cleared so `check_if_sat` is not a cache hit.
+    """
+    args = make_args(cls, n)
+    if args is None:
+        return dict(error="no instance generator")
+
+    result = dict()
+    for _ in range(repeat):
+        sat_cache.clear()
+        try:
+            cons = cls(*args)
+        except Exception as e:
+            return dict(error=f"{type(e).__name__}: {e}")
+        cons.solver_kwargs = dict(solver=solver)
+        cons.indicator = cp.boolvar(name="bv")
+
+        for method in METHODS:
+            if method == "check_if_sat" and not isinstance(cons, AuxGlobal):
+                continue
+            start = perf_counter()
+            try:
+                res = getattr(cons, method)()
+            except Exception as e:
+                return dict(error=f"{type(e).__name__} in {method}: {e}")
+            elapsed = perf_counter() - start
+
+            n_cons, n_vars = count(res, args, cons.indicator) if method != "check_if_sat" else (None, None)
+            prev = result.get(method, dict(time=math.inf))
+            result[method] = dict(time=min(prev["time"], elapsed), n_cons=n_cons, n_vars=n_vars)
+    return result
+
+
+def run_benchmarks(classes=None, sizes=(8, 16, 32, 64), repeat=3, solver="ortools"):
+    """
+        Run the microbenchmarks for all `classes` (default: all classes in `globalconstraints`) and scope `sizes`.
+        Returns a dict {class name: {size: {method: {time, n_cons, n_vars}}}}, sizes are strings to match the JSON baseline.
+    """
+    if classes is None:
+        classes = get_classes()
+    results = dict()
+    for cls in classes:
+        results[cls.__name__] = {str(n): bench_class(cls, n, repeat=repeat, solver=solver) for n in sizes}
+    return results
+
+
+def growth(results, key, method):
+    """
+        Empirical growth exponent of `key` between the two largest sizes, e.g., 2 for quadratic generation.
+    """
+    sizes = sorted(int(n) for n, res in results.items() if method in res and res[method][key])
+    if len(sizes) < 2:
+        return None
+    (n1, n2) = sizes[-2:]
+    v1, v2 = results[str(n1)][method][key], results[str(n2)][method][key]
+    return math.log(v2 / v1) / math.log(n2 / n1)
+
+
+def compare(results, baseline, time_tolerance=3, min_time=5e-3):
+    """
+        Compare the results to the baseline, returns a list of regressions.
+        A regression is an increase in the number of emitted constraints or variables,
+            or a generation time more than `time_tolerance` times the baseline (ignoring times below `min_time`).
+        Errors are regressions, also when they are stored in the baseline.
+    """
+    regressions = []
+    for name, per_size in results.items():
+        for n, res in per_size.items():
+            base = baseline.get(name, dict()).get(n)
+            if base is None:
+                continue
+            if "error" in res or "error" in base: # an error in the baseline should be fixed, not hidden
+                regressions.append(f"{name}[n={n}]: {res.get('error', base.get('error'))}")
+                continue
+            for method, measured in res.items():
+                if method not in base:
+                    continue
+                expected = base[method]
+                for key in ["n_cons", "n_vars"]:
+                    if measured[key] is not None and expected[key] is not None and measured[key] > expected[key]:
+                        regressions.append(f"{name}.{method}[n={n}]: {key} {expected[key]} -> {measured[key]}")
+                if measured["time"] > max(time_tolerance * expected["time"], min_time):
+                    regressions.append(f"{name}.{method}[n={n}]: time {expected['time']:.4f}s -> {measured['time']:.4f}s")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'class':40} {'method':14} {'size':>6} {'time (s)':>10} {'#cons':>8} {'#vars':>8} {'growth':>7}")
+    for name, per_size in results.items():
+        errors = {res["error"] for res in per_size.values() if "error" in res}
+        if len(errors):
+            print(f"{name:40} {'error':14} {', '.join(errors)}")
+            continue
+        methods = [m for m in METHODS if m in next(iter(per_size.values()))]
+        for method in methods:
+            for n, res in per_size.items():
+                measured = res[method]
+                print(f"{name:40} {method:14} {n:>6} {measured['time']:>10.5f} "
+                      f"{str(measured['n_cons']):>8} {str(measured['n_vars']):>8}", end="")
+                exponent = growth(per_size, "time", method) if n == list(per_size)[-1] else None
+                print(f" {exponent:>7.2f}" if exponent is not None else "")
+
+
+if __name__ == "__main__":
+
+    # SETUP BENCHMARK CONFIG HERE
+    sizes = [8, 16, 32, 64] # scope sizes of the global constraints
+    repeat = 3 # best of `repeat` runs
+    solver = "ortools" # used by `check_if_sat` for globals without a solver-free feasibility check
+    baseline_file = "benchmarks/reformulation_baseline.json"
+    update_baseline = False # set to True to store the results as new baseline
+
+    results = run_benchmarks(sizes=sizes, repeat=repeat, solver=solver)
+    print_results(results)
+
+    if update_baseline or not exists(baseline_file):
+        with open(baseline_file, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Stored baseline in {baseline_file}")
+    else:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        for reg in regressions:
+            print("REGRESSION", reg)
+        if len(regressions):
+            exit(1)
+        print("No regressions compared to baseline")
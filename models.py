@@ -20,7 +20,7 @@ def get_rcpsp_model(duration, precedence, resources, capacities, horizon, Cumula
     for machine_id, cap in enumerate(capacities):
         # find which task to schedule on machine m
         taskmask = resources.T[machine_id] != 0
-        task_idx = np.argwhere(taskmask)
+        task_idx = np.flatnonzero(taskmask)
         demand = resources.T[machine_id][taskmask]
         # add cumulative to model
         model += Cumulative(start=start[task_idx],
@@ -37,6 +37,8 @@ def get_set_model(cards, size_of_set, global_type):
 
     if global_type == "decomp":
         AllDifferent = BinaryDecomposedAllDifferent
+    elif global_type == "decompauto":
+        AllDifferent = DecomposedAllDifferent
     elif global_type == "aux":
         AllDifferent = AllDifferentAuxHalfReif
     elif global_type == "native":
@@ -112,6 +114,26 @@ def get_xcsp3_model(path, global_type=None):
                                   Regular=DecomposedRegular,
                                   Inverse=DecomposedInverse
                                   )
+
+    elif global_type == "decompauto": # decompositions picking their encoding based on the instance
+        global_constraints = dict(AllDifferent=DecomposedAllDifferent,
+                                  Cumulative=DecomposedCumulative,
+                                  NoOverlap=BinaryDecomposedNoOverlap,
+                                  NonReifiedTable=DecomposedTable,
+                                  NonReifiedNegativeTable=DecomposedNegativeTable,
+                                  Regular=DecomposedRegular,
+                                  Inverse=DecomposedInverse
+                                  )
+
+    elif global_type == "decompcompressed":
+        global_constraints = dict(AllDifferent=BinaryDecomposedAllDifferent,
+                                  Cumulative=TaskDecomposedCumulative,
+                                  NoOverlap=BinaryDecomposedNoOverlap,
+                                  NonReifiedTable=DecomposedCompressedTable,
+                                  NonReifiedNegativeTable=DecomposedCompressedNegativeTable,
+                                  Regular=DecomposedRegular,
+                                  Inverse=DecomposedInverse
+                                  )
     
     elif global_type == "aux":
         global_constraints = dict(AllDifferent=AllDifferentAuxHalfReif,
@@ -122,6 +144,16 @@ def get_xcsp3_model(path, global_type=None):
                                   Regular=RegularAuxHalfReif,
                                   Inverse=InverseAuxHalfReif
                                   )
+
+    elif global_type == "indicator":
+        global_constraints = dict(AllDifferent=AllDifferentAuxHalfReif,
+                                  Cumulative=CumulativeScaledHalfReif,
+                                  NoOverlap=NoOverlapOptionalHalfReif,
+                                  NonReifiedTable=TableIndicatorHalfReif,
+                                  NonReifiedNegativeTable=NegativeTableAuxHalfReif,
+                                  Regular=RegularIndicatorHalfReif,
+                                  Inverse=InverseAuxHalfReif
+                                  )
         
     elif global_type == "auxminimal":
         global_constraints = dict(AllDifferent=AllDifferentAuxHalfReif,
@@ -153,11 +185,62 @@ def get_xcsp3_model(path, global_type=None):
     else:
         raise ValueError(f"Unexpected value for global type, got {global_type}")
 
+    # globals without a dedicated reformulation, the decompositions keep decomposing them
+    if global_type in ("aux", "auxminimal", "indicator"):
+        global_constraints.update(Circuit=CircuitAuxHalfReif,
+                                  Increasing=IncreasingAuxHalfReif,
+                                  Decreasing=DecreasingAuxHalfReif,
+                                  AllEqual=AllEqualAuxHalfReif,
+                                  AllDifferentExcept0=AllDifferentExceptNAuxHalfReif,
+                                  AllDifferentExceptN=AllDifferentExceptNAuxHalfReif,
+                                  Element=ElementAuxHalfReif,
+                                  Minimum=MinimumAuxHalfReif,
+                                  Maximum=MaximumAuxHalfReif,
+                                  NValue=NValueAuxHalfReif
+                                  )
+    elif global_type in ("auxdummy", "auxminimaldummy"):
+        global_constraints.update(Circuit=CircuitAuxHalfReifDummy,
+                                  Increasing=IncreasingAuxHalfReifDummy,
+                                  Decreasing=DecreasingAuxHalfReifDummy,
+                                  AllEqual=AllEqualAuxHalfReifDummy,
+                                  AllDifferentExcept0=AllDifferentExceptNAuxHalfReifDummy,
+                                  AllDifferentExceptN=AllDifferentExceptNAuxHalfReifDummy,
+                                  Element=ElementAuxHalfReifDummy,
+                                  Minimum=MinimumAuxHalfReifDummy,
+                                  Maximum=MaximumAuxHalfReifDummy,
+                                  NValue=NValueAuxHalfReifDummy
+                                  )
+
     from cpmpy.transformations.normalize import toplevel_list
     from cpmpy.transformations.decompose_global import decompose_in_tree
+    from cpmpy.expressions.core import Comparison
     from cpmpy.expressions.globalconstraints import GlobalConstraint
+    from cpmpy.expressions.globalfunctions import GlobalFunction
+    from cpmpy.expressions.utils import is_num
+    from cpmpy.expressions.variables import _NumVarImpl
     from cpmpy.tools.xcsp3 import read_xcsp3
 
+    flipped = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+    def get_function_comparison(cons):
+        """
+            Rewrite `cons` as a comparison `func(...) <op> rhs` with a global function in the map,
+                over variables and constants only so the arguments can be replaced by auxiliary variables.
+            Returns None if this is not possible.
+        """
+        if not isinstance(cons, Comparison) or cons.name not in flipped:
+            return None
+        lhs, rhs = cons.args
+        if not isinstance(lhs, GlobalFunction):
+            if not isinstance(rhs, GlobalFunction):
+                return None
+            cons = Comparison(flipped[cons.name], rhs, lhs)
+            lhs, rhs = cons.args
+        if type(lhs).__name__ not in global_constraints:
+            return None
+        if not all(is_num(a) or isinstance(a, _NumVarImpl) for a in flatlist([lhs.args, rhs])):
+            return None
+        return cons
+
     print("Reading", path)
     model = read_xcsp3(path)
 
@@ -169,7 +252,10 @@ def get_xcsp3_model(path, global_type=None):
             # check if in map
             if type(cons).__name__ in global_constraints:
                 CLS = global_constraints[type(cons).__name__]
-                model.constraints[i] = CLS(*cons.args)
+                args = list(cons.args)
+                if isinstance(cons, cp.Cumulative) and len(args) == 4: # CPMpy drops `end` from the arguments if it is None
+                    args = args[:2] + [None] + args[2:]
+                model.constraints[i] = CLS(*args)
                 num_glob += 1
             else:
                 model.constraints[i] = cp.all(decompose_in_tree([cons])) # decompose
@@ -189,6 +275,11 @@ def get_xcsp3_model(path, global_type=None):
                 #     decomposed = new_decomposed
                 #
                 # model.constraints[i] = cp.all(decomposed)
+        elif get_function_comparison(cons) is not None:
+            cons = get_function_comparison(cons)
+            CLS = global_constraints[type(cons.args[0]).__name__]
+            model.constraints[i] = from_comparison(CLS, cons)
+            num_glob += 1
 
     print("Solving model with", num_glob, "custom global constraints")
     return model
@@ -0,0 +1,5 @@
+import sys
+from os.path import dirname, abspath
+
+# the repository root is not a package, make `globalconstraints` and `utils` importable from the tests
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
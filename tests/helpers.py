@@ -0,0 +1,34 @@
+import cpmpy as cp
+from cpmpy.expressions.utils import flatlist
+
+from globalconstraints.cache import sat_cache
+
+
+def solutions(constraints, vars, solver="ortools"):
+    """
+        All solutions of `constraints`, projected on `vars`.
+    """
+    sols = set()
+    # make sure all variables are enumerated, also those not occurring in the constraints
+    constraints = list(constraints) + [cp.sum(vars) >= sum(v.lb for v in vars)]
+    cp.Model(constraints).solveAll(solver=solver, display=lambda: sols.add(tuple(int(v.value()) for v in vars)))
+    return sols
+
+def half_reify(cons, bv, solver="ortools"):
+    """
+        Rewrite bv -> cons using the `toplevel`, `iftrue` and `iffalse` methods, as `decompose_globals` does.
+    """
+    sat_cache.clear()
+    cons.solver_kwargs = dict(solver=solver)
+    cons.indicator = bv
+    rewritten = [cons.toplevel(), bv.implies(cp.all(cons.iftrue())), (~bv).implies(cp.all(cons.iffalse()))]
+    return [c for c in flatlist(rewritten) if c is not None and c is not True]
+
+def assert_equivalent(cls, args, vars, solver="ortools"):
+    """
+        Check that the half-reification of `cls(*args)` has the same solutions as the one of its CPMpy version.
+    """
+    bv = cp.boolvar(name="bv")
+    cons = cls(*args)
+    expected = solutions([bv.implies(cons.cpm_global(*cons.args))], vars + [bv])
+    assert solutions(half_reify(cons, bv, solver=solver), vars + [bv]) == expected
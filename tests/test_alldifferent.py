@@ -0,0 +1,22 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import BinaryDecomposedAllDifferent, ValueDecomposedAllDifferent, DecomposedAllDifferent, \
+    AllDifferentExceptNAuxHalfReif, AllDifferentExceptNAuxHalfReifDummy
+from helpers import assert_equivalent
+
+
+@pytest.mark.parametrize("cls", [BinaryDecomposedAllDifferent, ValueDecomposedAllDifferent, DecomposedAllDifferent])
+def test_equivalent_to_reference(cls):
+    x = cp.intvar(0, 2, shape=3, name="x")
+    assert_equivalent(cls, tuple(x), list(x))
+    y = [cp.intvar(0, 1, name="y0"), cp.intvar(0, 1, name="y1"), cp.intvar(0, 1, name="y2")] # pigeonhole
+    assert_equivalent(cls, tuple(y), y)
+
+@pytest.mark.parametrize("cls", [AllDifferentExceptNAuxHalfReif, AllDifferentExceptNAuxHalfReifDummy])
+def test_except_n(cls):
+    x = cp.intvar(0, 2, shape=3, name="x")
+    assert_equivalent(cls, (x, 0), list(x))
+    assert_equivalent(cls, (x, [0, 1]), list(x))
+    y = [cp.intvar(1, 2, name="y0"), cp.intvar(1, 2, name="y1"), cp.intvar(1, 2, name="y2")] # pigeonhole, except for 0
+    assert_equivalent(cls, (y, 0), y)
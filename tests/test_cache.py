@@ -0,0 +1,41 @@
+import multiprocessing
+
+import cpmpy as cp
+
+from globalconstraints.cache import SatCache
+
+
+def test_key():
+    cache = SatCache()
+    x, y = cp.intvar(0, 3, shape=2, name="x"), cp.intvar(0, 3, shape=2, name="y")
+    assert cache.key(cp.AllDifferent, tuple(x)) == cache.key(cp.AllDifferent, tuple(y))
+    assert cache.key(cp.AllDifferent, tuple(x)) != cache.key(cp.AllDifferent, (x[0], x[0]))
+    assert cache.key(cp.AllDifferent, (x[0] + 1, x[1])) is None
+
+def test_persistence(tmp_path):
+    fname = str(tmp_path / "cache")
+    cache = SatCache(fname=fname)
+    cache.put("feasible", [1, 2])
+    cache.put("infeasible", None)
+    cache.close()
+
+    cache = SatCache(fname=fname)
+    assert cache.get("feasible") == (True, [1, 2])
+    assert cache.get("infeasible") == (True, None)
+    assert cache.get("unknown") == (False, None)
+    cache.close()
+
+def test_no_persistence_in_child_process(tmp_path):
+    fname = str(tmp_path / "cache")
+    cache = SatCache(fname=fname)
+    cache.put("parent", [1])
+    child = multiprocessing.get_context("fork").Process(target=cache.put, args=("child", [2]))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    cache.close()
+
+    cache = SatCache(fname=fname)
+    assert cache.get("parent") == (True, [1])
+    assert cache.get("child") == (False, None)
+    cache.close()
@@ -0,0 +1,14 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import CircuitAuxHalfReif, CircuitAuxHalfReifDummy
+from helpers import assert_equivalent
+
+
+@pytest.mark.parametrize("cls", [CircuitAuxHalfReif, CircuitAuxHalfReifDummy])
+def test_equivalent_to_reference(cls):
+    succ = cp.intvar(0, 3, shape=4, name="succ")
+    assert_equivalent(cls, tuple(succ), list(succ))
+    # successors outside of the circuit, and a node that can only point to itself
+    succ = [cp.intvar(1, 4, name="s0"), cp.intvar(0, 2, name="s1"), cp.intvar(-1, 0, name="s2"), cp.intvar(3, 3, name="s3")]
+    assert_equivalent(cls, tuple(succ), succ)
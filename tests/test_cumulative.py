@@ -0,0 +1,41 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import TaskDecomposedCumulative, TimeDecomposedCumulative, DecomposedCumulative, \
+    CumulativeScaledHalfReif
+from helpers import assert_equivalent, half_reify
+
+
+DECOMPOSITIONS = [TaskDecomposedCumulative, TimeDecomposedCumulative, DecomposedCumulative]
+
+@pytest.mark.parametrize("cls", DECOMPOSITIONS)
+def test_fixed_durations(cls):
+    start = cp.intvar(0, 4, shape=3, name="start")
+    assert_equivalent(cls, (start, [2, 1, 3], None, [1, 2, 1], 2), list(start))
+
+@pytest.mark.parametrize("cls", DECOMPOSITIONS)
+def test_variable_durations_and_capacity(cls):
+    start = cp.intvar(0, 3, shape=3, name="start")
+    dur = cp.intvar(0, 2, shape=3, name="dur")
+    cap = cp.intvar(1, 2, name="cap")
+    assert_equivalent(cls, (start, dur, None, [1, 1, 2], cap), list(start) + list(dur) + [cap])
+
+@pytest.mark.parametrize("cls", DECOMPOSITIONS)
+def test_disjoint_windows(cls):
+    # the bounds make the first two tasks disjoint from the last one
+    start = [cp.intvar(0, 2, name="s0"), cp.intvar(0, 2, name="s1"), cp.intvar(6, 8, name="s2")]
+    assert_equivalent(cls, (start, [2, 2, 2], None, [1, 1, 2], 1), start)
+
+def test_without_end():
+    start = cp.intvar(0, 4, shape=3, name="start")
+    cons = DecomposedCumulative(start, [2, 1, 3], demand=[1, 2, 1], capacity=2)
+    assert cons.args[2] is None and len(cons.args) == 5
+
+@pytest.mark.parametrize("solver, posted", [("ortools", cp.CumulativeOptional), ("exact", cp.Cumulative)])
+def test_scaled(solver, posted):
+    # optional tasks if the solver supports them, demands scaled by the indicator otherwise
+    start = cp.intvar(0, 3, shape=3, name="start")
+    args = (start, [2, 1, 2], None, [1, 2, 1], 2)
+    assert_equivalent(CumulativeScaledHalfReif, args, list(start), solver=solver)
+    cons = half_reify(CumulativeScaledHalfReif(*args), cp.boolvar(name="bv"), solver=solver)
+    assert any(type(c) is posted for c in cons)
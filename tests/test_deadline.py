@@ -0,0 +1,45 @@
+import cpmpy as cp
+import pytest
+
+from experiments import compute_maxcsp
+from globalconstraints import CumulativeAuxHalfReif
+from globalconstraints.cache import sat_cache
+from globalconstraints.deadline import Deadline, limit_time
+from utils import decompose_globals
+
+
+def cumulatives():
+    # no solver-free feasibility check, so the solver is called with the remaining time
+    start = cp.intvar(0, 4, shape=3, name="start")
+    bvs = cp.boolvar(shape=2, name="bv")
+    return [bvs[0].implies(CumulativeAuxHalfReif(start, [2, 2, 2], None, [1, 1, 1], 2)),
+            bvs[1].implies(CumulativeAuxHalfReif(start, [2, 2, 2], None, [1, 2, 1], 2))]
+
+def test_limit_time():
+    assert limit_time(dict(time_limit=10)) == dict(time_limit=10)
+    assert limit_time(dict(time_limit=10), Deadline()) == dict(time_limit=10)
+    assert limit_time(dict(time_limit=10), Deadline(60))["time_limit"] == 10
+    assert 0 < limit_time(dict(time_limit=60), Deadline(5))["time_limit"] <= 5
+    assert 0 < limit_time(dict(), Deadline(5))["time_limit"] <= 5
+    with pytest.raises(TimeoutError):
+        limit_time(dict(time_limit=10), Deadline(0))
+
+def test_never_expires():
+    deadline = Deadline()
+    assert deadline.remaining() is None and not deadline.expired()
+    assert Deadline(0).expired() and Deadline(0).remaining() == 0
+
+@pytest.mark.parametrize("decompose_kwargs", [dict(), dict(batch=True), dict(share=True)])
+def test_decompose_after_deadline(decompose_kwargs):
+    sat_cache.clear()
+    with pytest.raises(TimeoutError):
+        decompose_globals(cumulatives(), solver="ortools", deadline=Deadline(0), **decompose_kwargs)
+    sat_cache.clear()
+    assert len(decompose_globals(cumulatives(), solver="ortools", deadline=Deadline(60), **decompose_kwargs)) > 0
+
+def test_shared_budget():
+    sat_cache.clear()
+    result = compute_maxcsp(cumulatives(), [], [1, 1], solver="ortools", time_limit=30)
+    assert result["status"] == "optimal" and result["solve_budget"] <= 30 - result["init_time"] + 1e-3
+    sat_cache.clear()
+    assert compute_maxcsp(cumulatives(), [], [1, 1], solver="ortools", time_limit=0)["status"] == "timeout in decompose"
@@ -0,0 +1,38 @@
+from functools import partial
+
+from benchmarks.generated import generate_set_instance
+from experiments import run_experiments, build_model_params
+from models import get_set_model
+from utils import read_results
+
+
+def test_parallel_errors_are_recorded(tmp_path):
+    store = str(tmp_path / "results.jsonl")
+    data = generate_set_instance(9, size_of_set=3, seed=0)
+    configs = [(partial(build_model_params, model_func=get_set_model, **data, global_type="aux"), dict(id=0)),
+               (partial(int, "not a builder"), dict(id=1)),
+               (partial(build_model_params, model_func=get_set_model, **data, global_type="decomp"), dict(id=2))]
+
+    results = run_experiments(configs, "justsolve", "ortools", "default", n_workers=2, store=store, time_limit=10)
+    assert [r["status"] for r in results][1] == "error"
+    assert all(r["status"] != "error" for i, r in enumerate(results) if i != 1)
+    assert len(read_results(store)) == 3
+
+    # only the experiment which raised an error is run again
+    results = run_experiments(configs, "justsolve", "ortools", "default", n_workers=2, store=store, time_limit=10)
+    assert len(results) == 1 and results[0]["id"] == 1
+    assert len(read_results(store)) == 3
+
+def test_options_in_result_key(tmp_path):
+    store = str(tmp_path / "results.jsonl")
+    data = generate_set_instance(9, size_of_set=3, seed=0)
+    configs = [(partial(build_model_params, model_func=get_set_model, **data, global_type="aux"), dict(id=0))]
+
+    run_experiments(configs, "justsolve", "ortools", "default", store=store, time_limit=10)
+    assert run_experiments(configs, "justsolve", "ortools", "default", store=store, time_limit=10) == []
+    # other options give other results, they are not skipped
+    results = run_experiments(configs, "justsolve", "ortools", "default", store=store, time_limit=10,
+                              decompose_kwargs=dict(batch=True))
+    assert len(results) == 1 and results[0]["decompose_batch"] is True
+    assert len(run_experiments(configs, "justsolve", "ortools", "default", store=store, time_limit=20)) == 1
+    assert len(read_results(store)) == 3
@@ -0,0 +1,32 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import ElementAuxHalfReif, ElementAuxHalfReifDummy, MinimumAuxHalfReif, MinimumAuxHalfReifDummy, \
+    MaximumAuxHalfReif, MaximumAuxHalfReifDummy, NValueAuxHalfReif, NValueAuxHalfReifDummy
+from globalconstraints.functions import from_comparison
+from helpers import assert_equivalent
+
+
+@pytest.mark.parametrize("cls", [ElementAuxHalfReif, ElementAuxHalfReifDummy])
+@pytest.mark.parametrize("op", ["==", "<=", "!="])
+def test_element(cls, op):
+    arr = cp.intvar(0, 2, shape=3, name="arr")
+    idx = cp.intvar(0, 3, name="idx") # partial, index 3 is out of bounds
+    rhs = cp.intvar(0, 2, name="rhs")
+    assert_equivalent(cls, (arr, idx, op, rhs), list(arr) + [idx, rhs])
+
+@pytest.mark.parametrize("cls", [MinimumAuxHalfReif, MinimumAuxHalfReifDummy, MaximumAuxHalfReif, MaximumAuxHalfReifDummy,
+                                 NValueAuxHalfReif, NValueAuxHalfReifDummy])
+@pytest.mark.parametrize("op", ["==", "<", ">="])
+def test_aggregates(cls, op):
+    arr = cp.intvar(0, 2, shape=3, name="arr")
+    rhs = cp.intvar(0, 3, name="rhs")
+    assert_equivalent(cls, (arr, op, rhs), list(arr) + [rhs])
+    assert_equivalent(cls, (arr, op, 3), list(arr))
+
+def test_from_comparison():
+    arr, idx = cp.intvar(0, 2, shape=3, name="arr"), cp.intvar(0, 2, name="idx")
+    cons = from_comparison(ElementAuxHalfReif, cp.Element(arr, idx) <= 1)
+    assert str(cons.args[1]) == "idx" and cons.args[2:] == ("<=", 1)
+    cons = from_comparison(MaximumAuxHalfReif, cp.Maximum(arr) != 2)
+    assert cons.args[1:] == ("!=", 2)
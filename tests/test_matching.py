@@ -0,0 +1,34 @@
+import cpmpy as cp
+
+from globalconstraints import AllDifferentAuxHalfReif, InverseAuxHalfReif, GCCAuxHalfReif
+from globalconstraints.matching import alldifferent_sol, gcc_sol, inverse_sol, get_domain, MAX_DOMAIN_SIZE
+from helpers import assert_equivalent
+
+
+def test_alldifferent_sol():
+    x = cp.intvar(0, 2, shape=3, name="x")
+    decided, sol = alldifferent_sol(list(x))
+    assert decided and sorted(sol) == [0, 1, 2]
+    assert alldifferent_sol(list(x) + [cp.intvar(1, 2, name="y")]) == (True, None)
+
+def test_wide_domains_use_solver():
+    x = cp.intvar(0, 10**6, shape=3, name="x")
+    assert get_domain(x[0]) is None
+    assert get_domain(cp.intvar(0, MAX_DOMAIN_SIZE - 1)) is not None
+    assert alldifferent_sol(list(x)) == (False, None)
+    assert gcc_sol((list(x), [0], [cp.intvar(0, 3)])) == (False, None)
+    assert inverse_sol((list(x), list(cp.intvar(0, 2, shape=3)))) == (False, None)
+
+def test_inverse_shared_variable_uses_solver():
+    x = cp.intvar(0, 2, shape=3, name="x")
+    y = cp.intvar(0, 2, shape=2, name="y")
+    # x[0] occurs in both arrays, and must take the same value in both
+    assert inverse_sol(([x[0], x[1], x[2]], [x[0], y[0], y[1]])) == (False, None)
+    assert_equivalent(InverseAuxHalfReif, ([x[0], x[1], x[2]], [x[0], y[0], y[1]]), list(x) + list(y))
+
+def test_equivalent_to_reference():
+    x = cp.intvar(0, 3, shape=3, name="x")
+    occ = cp.intvar(0, 2, shape=2, name="occ")
+    assert_equivalent(AllDifferentAuxHalfReif, tuple(x), list(x))
+    assert_equivalent(GCCAuxHalfReif, (list(x), [1, 2], list(occ)), list(x) + list(occ))
+    assert_equivalent(InverseAuxHalfReif, (list(x[:3]), list(cp.intvar(0, 2, shape=3, name="r"))), list(x))
@@ -0,0 +1,42 @@
+import cpmpy as cp
+import numpy as np
+import pytest
+from cpmpy.tools.explain.utils import make_assump_model
+
+from benchmarks.rcpsp import read_rcpsp
+from globalconstraints import TaskDecomposedCumulative, DecomposedCumulative, CumulativeAuxHalfReif, \
+    CumulativeAuxHalfReifMinimal, CumulativeScaledHalfReif
+from models import get_rcpsp_model, get_xcsp3_model
+from utils import decompose_globals
+
+
+RCPSP = dict(duration=np.array([0, 3, 2, 2, 1, 0]),
+             precedence=np.array([[0, 1], [0, 2], [0, 3], [1, 4], [2, 5], [3, 5], [4, 5]]),
+             resources=np.array([[0, 0], [2, 1], [1, 0], [1, 1], [0, 1], [0, 0]]),
+             capacities=[2, 1], horizon=10)
+
+@pytest.mark.parametrize("cls", [TaskDecomposedCumulative, DecomposedCumulative, CumulativeAuxHalfReif,
+                                 CumulativeAuxHalfReifMinimal, CumulativeScaledHalfReif])
+def test_rcpsp(cls):
+    reference = get_rcpsp_model(**RCPSP, Cumulative=cp.Cumulative)
+    assert reference.solve(solver="ortools")
+
+    model = get_rcpsp_model(**RCPSP, Cumulative=cls)
+    assump_model, soft, assump = make_assump_model(soft=model.constraints)
+    s = cp.SolverLookup.get("ortools")
+    s += decompose_globals(assump_model.constraints, solver="ortools")
+    s += assump
+    s.minimize(model.objective_)
+    assert s.solve() and s.objective_value() == reference.objective_value()
+
+def test_rcpsp_j60():
+    data = read_rcpsp("benchmarks/rcpsp_j60/j6010_1.sm")
+    model = get_rcpsp_model(**data, Cumulative=TaskDecomposedCumulative)
+    assump_model, soft, assump = make_assump_model(soft=model.constraints)
+    assert len(decompose_globals(assump_model.constraints, solver="ortools")) > 0
+
+def test_xcsp3_cumulative():
+    pytest.importorskip("pycsp3")
+    model = get_xcsp3_model("benchmarks/xcsp3_instances/Cargo-02-0s-1139_c24.xml.lzma", global_type="decomp")
+    cumulatives = [c for c in model.constraints if isinstance(c, TaskDecomposedCumulative)]
+    assert len(cumulatives) == 3 and all(c.args[2] is None for c in cumulatives)
@@ -0,0 +1,55 @@
+import cpmpy as cp
+
+from globalconstraints import BinaryDecomposedNoOverlap, NoOverlapOptionalHalfReif
+from globalconstraints.nooverlap import nooverlap_sol
+from helpers import assert_equivalent, half_reify
+
+
+def test_fixed_durations():
+    start = cp.intvar(0, 5, shape=3, name="start")
+    assert_equivalent(BinaryDecomposedNoOverlap, (start, [2, 1, 3], None), list(start))
+
+def test_disjoint_windows():
+    # the bounds make the first two jobs disjoint from the last one, and order the first one before the second one
+    start = [cp.intvar(0, 2, name="s0"), cp.intvar(2, 4, name="s1"), cp.intvar(8, 10, name="s2")]
+    assert_equivalent(BinaryDecomposedNoOverlap, (start, [2, 2, 2], None), start)
+
+def test_cannot_be_ordered():
+    start = [cp.intvar(0, 1, name="s0"), cp.intvar(0, 1, name="s1")]
+    assert_equivalent(BinaryDecomposedNoOverlap, (start, [3, 3], None), start)
+
+def test_zero_durations():
+    start = cp.intvar(0, 3, shape=3, name="start")
+    assert_equivalent(BinaryDecomposedNoOverlap, (start, [0, 2, 2], None), list(start))
+    dur = cp.intvar(-1, 2, shape=3, name="dur")
+    assert_equivalent(BinaryDecomposedNoOverlap, (start, dur, None), list(start) + list(dur))
+
+def test_without_end():
+    start = cp.intvar(0, 5, shape=3, name="start")
+    cons = BinaryDecomposedNoOverlap(start, [2, 1, 3])
+    assert cons.args[2] is None and len(cons.args) == 3
+
+def test_nooverlap_sol():
+    start = [cp.intvar(0, 4, name="s0"), cp.intvar(0, 1, name="s1"), cp.intvar(2, 6, name="s2")]
+    decided, sol = nooverlap_sol((start, [2, 2, 2], None))
+    assert decided and sol == [[2, 0, 4], [2, 2, 2], None]
+    # the greedy schedule fails, it does not decide the instance is infeasible
+    assert nooverlap_sol(([cp.intvar(0, 1, name="s3"), cp.intvar(0, 1, name="s4")], [3, 3], None)) == (False, None)
+
+def test_optional_native():
+    start = cp.intvar(0, 4, shape=3, name="start")
+    assert_equivalent(NoOverlapOptionalHalfReif, (start, [2, 1, 2], None), list(start), solver="ortools")
+    cons = half_reify(NoOverlapOptionalHalfReif(start, [2, 1, 2]), cp.boolvar(name="bv"), solver="ortools")
+    assert any(isinstance(c, cp.NoOverlapOptional) for c in cons)
+
+def test_optional_fallback():
+    # "exact" does not support optional intervals, the feasibility check of the fallback is decided without solver
+    start = cp.intvar(0, 4, shape=3, name="start")
+    assert_equivalent(NoOverlapOptionalHalfReif, (start, [2, 1, 2], None), list(start), solver="exact")
+    cons = half_reify(NoOverlapOptionalHalfReif(start, [2, 1, 2]), cp.boolvar(name="bv"), solver="exact")
+    assert any(isinstance(c, cp.NoOverlap) for c in cons)
+    assert not any(isinstance(c, cp.NoOverlapOptional) for c in cons)
+
+def test_nooverlap_sol_shared_variable():
+    s = cp.intvar(0, 4, name="s")
+    assert nooverlap_sol(([s, s], [2, 2], None)) == (False, None)
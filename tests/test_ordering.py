@@ -0,0 +1,24 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import IncreasingAuxHalfReif, IncreasingAuxHalfReifDummy, DecreasingAuxHalfReif, \
+    DecreasingAuxHalfReifDummy, AllEqualAuxHalfReif, AllEqualAuxHalfReifDummy
+from globalconstraints.ordering import increasing_sol, decreasing_sol, allequal_sol
+from helpers import assert_equivalent
+
+
+@pytest.mark.parametrize("cls", [IncreasingAuxHalfReif, IncreasingAuxHalfReifDummy, DecreasingAuxHalfReif,
+                                 DecreasingAuxHalfReifDummy, AllEqualAuxHalfReif, AllEqualAuxHalfReifDummy])
+def test_equivalent_to_reference(cls):
+    x = cp.intvar(0, 2, shape=3, name="x")
+    assert_equivalent(cls, tuple(x), list(x))
+    y = [cp.intvar(2, 3, name="y0"), cp.intvar(0, 1, name="y1"), cp.intvar(1, 2, name="y2")]
+    assert_equivalent(cls, tuple(y), y)
+
+def test_greedy_sols():
+    y = [cp.intvar(2, 3, name="y0"), cp.intvar(0, 1, name="y1"), cp.intvar(1, 2, name="y2")]
+    assert increasing_sol(y) == (True, None)
+    assert decreasing_sol(y) == (True, [2, 1, 1])
+    assert allequal_sol(y) == (True, None)
+    assert allequal_sol([y[0], y[2]]) == (True, [2, 2])
+    assert increasing_sol([y[0] + 1, y[1]]) == (False, None)
@@ -0,0 +1,24 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import RegularIndicatorHalfReif, DecomposedRegular, RegularAuxHalfReif
+from helpers import assert_equivalent, half_reify, solutions
+
+
+# no three consecutive 1's
+TRANSITIONS = [("a", 0, "a"), ("a", 1, "b"), ("b", 0, "a"), ("b", 1, "c"), ("c", 0, "a")]
+
+@pytest.mark.parametrize("cls", [RegularIndicatorHalfReif, DecomposedRegular, RegularAuxHalfReif])
+def test_equivalent_to_reference(cls):
+    x = cp.intvar(0, 1, shape=4, name="x")
+    assert_equivalent(cls, (x, TRANSITIONS, "a", ["a", "b", "c"]), list(x))
+    # values outside of the alphabet are never accepted, but can be taken when the indicator is false
+    y = cp.intvar(0, 2, shape=3, name="y")
+    assert_equivalent(cls, (y, TRANSITIONS, "a", ["b", "c"]), list(y))
+
+def test_indicator_negated():
+    x = cp.intvar(0, 1, shape=4, name="x")
+    b = cp.boolvar(name="b")
+    cons = RegularIndicatorHalfReif(x, TRANSITIONS, "a", ["a", "b", "c"])
+    reference = [(~b).implies(cp.Regular(x, TRANSITIONS, "a", ["a", "b", "c"]))]
+    assert solutions(half_reify(cons, ~b), list(x) + [b]) == solutions(reference, list(x) + [b])
@@ -0,0 +1,91 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import AllDifferentAuxHalfReif, AllDifferentAuxHalfReifDummySol, TableAuxHalfReif, CumulativeAuxHalfReif
+from globalconstraints.cache import sat_cache
+from globalconstraints.superclass import check_if_sat_batch, check_if_sat_parallel
+from utils import decompose_globals
+from helpers import solutions
+
+
+def decompose(cons, share):
+    sat_cache.clear()
+    return decompose_globals(cons, solver="ortools", share=share)
+
+def count_globals(cons):
+    return sum(1 for c in cons if isinstance(c, cp.AllDifferent))
+
+def test_share_identical_globals():
+    x = cp.intvar(0, 2, shape=3, name="x")
+    bvs = cp.boolvar(shape=3, name="bv")
+    cons = [bv.implies(AllDifferentAuxHalfReif(*x)) for bv in bvs]
+    reference = solutions([bv.implies(cp.AllDifferent(x)) for bv in bvs], list(x) + list(bvs))
+
+    assert count_globals(decompose(cons, share=False)) == 3
+    shared = decompose(cons, share=True)
+    assert count_globals(shared) == 1
+    assert solutions(shared, list(x) + list(bvs)) == reference
+
+def test_no_sharing_of_different_args():
+    x = cp.intvar(0, 2, shape=3, name="x")
+    bvs = cp.boolvar(shape=2, name="bv")
+    cons = [bvs[0].implies(AllDifferentAuxHalfReif(*x)), bvs[1].implies(AllDifferentAuxHalfReif(x[0], x[1]))]
+    assert count_globals(decompose(cons, share=True)) == 2
+
+def test_no_sharing_of_dummy_sol():
+    x = cp.intvar(0, 2, shape=3, name="x")
+    bvs = cp.boolvar(shape=2, name="bv")
+    cons = [bv.implies(AllDifferentAuxHalfReifDummySol(*x)) for bv in bvs]
+    reference = solutions([bv.implies(cp.AllDifferent(x)) for bv in bvs], list(x) + list(bvs))
+    assert solutions(decompose(cons, share=True), list(x) + list(bvs)) == reference
+
+def test_no_group_sharing_of_copied_globals():
+    # the auxiliary copy of x1 would be shared by the Table and the AllDifferent of `a`, and channeled by `b`
+    x = cp.intvar(0, 2, shape=3, name="x")
+    a, b = cp.boolvar(name="a"), cp.boolvar(name="b")
+    cons = [a.implies(AllDifferentAuxHalfReif(x[0], x[1])), a.implies(TableAuxHalfReif([x[1], x[2]], [[0, 0]])),
+            b.implies(AllDifferentAuxHalfReif(x[0], x[1]))]
+    reference = [a.implies(cp.AllDifferent(x[0], x[1])), a.implies(cp.Table([x[1], x[2]], [[0, 0]])),
+                 b.implies(cp.AllDifferent(x[0], x[1]))]
+    assert solutions(decompose(cons, share=True), list(x) + [a, b]) == solutions(reference, list(x) + [a, b])
+
+def mixed_globals():
+    # feasible and infeasible globals, decided by a solver, by `find_sol` and structurally equal to an earlier one
+    start = cp.intvar(0, 4, shape=3, name="start")
+    x = cp.intvar(0, 1, shape=3, name="x")
+    return [CumulativeAuxHalfReif(start, [2, 2, 2], None, [1, 1, 1], 2),
+            CumulativeAuxHalfReif(start, [2, 2, 2], None, [1, 3, 1], 2),
+            AllDifferentAuxHalfReif(*x),
+            AllDifferentAuxHalfReif(x[0], x[1]),
+            CumulativeAuxHalfReif(start, [2, 2, 2], None, [1, 1, 1], 2)]
+
+def sequential_feasibility():
+    sat_cache.clear()
+    aux_globals = mixed_globals()
+    for g in aux_globals:
+        g.solver_kwargs = dict(solver="ortools")
+        g.check_if_sat()
+    return [g.sol is not None for g in aux_globals]
+
+def assert_witnesses(aux_globals):
+    for g in aux_globals:
+        assert g.sol is None or g.cpm_global(*g.sol).value()
+
+def test_batch_same_as_sequential():
+    sat_cache.clear()
+    aux_globals = mixed_globals()
+    check_if_sat_batch(aux_globals, solver="ortools")
+    assert [g.sol is not None for g in aux_globals] == sequential_feasibility() == [True, False, False, True, True]
+    assert_witnesses(aux_globals)
+
+def test_parallel_same_as_sequential():
+    sat_cache.clear()
+    aux_globals = mixed_globals()
+    check_if_sat_parallel(aux_globals, solver="ortools", n_workers=2, time_budget=60)
+    assert [g.sol is not None for g in aux_globals] == sequential_feasibility()
+    assert_witnesses(aux_globals)
+
+def test_parallel_time_budget():
+    sat_cache.clear()
+    with pytest.raises(TimeoutError):
+        check_if_sat_parallel(mixed_globals(), solver="ortools", n_workers=2, time_budget=0)
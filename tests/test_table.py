@@ -0,0 +1,36 @@
+import cpmpy as cp
+import pytest
+
+from globalconstraints import DecomposedTable, DecomposedCompressedTable, DecomposedNegativeTable, \
+    DecomposedCompressedNegativeTable, TableIndicatorHalfReif
+from helpers import assert_equivalent, half_reify
+
+
+DECOMPOSITIONS = [DecomposedTable, DecomposedCompressedTable, DecomposedNegativeTable, DecomposedCompressedNegativeTable]
+
+@pytest.mark.parametrize("cls", DECOMPOSITIONS)
+def test_equivalent_to_reference(cls):
+    x = cp.intvar(0, 2, shape=3, name="x")
+    table = [[0, 1, 2], [0, 2, 2], [1, 1, 1], [2, 0, 0], [3, 0, 0]]
+    assert_equivalent(cls, (x, table), list(x))
+
+@pytest.mark.parametrize("cls", DECOMPOSITIONS)
+def test_constant_next_to_negated_bool(cls):
+    # the negated Boolean is not a plain variable, the constant column still has to be matched
+    x, b = cp.intvar(0, 1, name="x"), cp.boolvar(name="b")
+    assert_equivalent(cls, ([x, 3, ~b], [[0, 5, 1], [1, 3, 0]]), [x, b])
+
+@pytest.mark.parametrize("solver", ["ortools", "exact"])
+def test_indicator(solver):
+    # a ShortTable with a wildcard row if the solver supports it, the expanded wildcard row otherwise
+    x = cp.intvar(0, 2, shape=3, name="x")
+    table = [[0, 1, 2], [0, 2, 2], [1, 1, 1], [3, 0, 0]]
+    assert_equivalent(TableIndicatorHalfReif, (x, table), list(x), solver=solver)
+    assert_equivalent(TableIndicatorHalfReif, (x, [[3, 0, 0]]), list(x), solver=solver)
+
+def test_indicator_too_many_rows(monkeypatch):
+    monkeypatch.setattr(TableIndicatorHalfReif, "max_expanded_rows", 10)
+    x = cp.intvar(0, 2, shape=3, name="x")
+    cons = half_reify(TableIndicatorHalfReif(x, [[0, 1, 2], [1, 1, 1]]), cp.boolvar(name="bv"), solver="exact")
+    assert any(isinstance(c, cp.ShortTable) for c in cons)
+    assert_equivalent(TableIndicatorHalfReif, (x, [[0, 1, 2], [1, 1, 1]]), list(x), solver="exact")
@@ -0,0 +1,44 @@
+import cpmpy as cp
+
+import utils
+from globalconstraints import TableAuxHalfReif, AllDifferentAuxHalfReif
+from globalconstraints.cache import sat_cache
+from helpers import solutions
+
+
+def test_hints_follow_weights(monkeypatch):
+    sat_cache.clear()
+    x = cp.intvar(0, 2, name="x")
+    bv9, bv10 = cp.boolvar(name="bv9"), cp.boolvar(name="bv10")
+    model = cp.Model([bv9.implies(TableAuxHalfReif([x], [[0]])), bv10.implies(TableAuxHalfReif([x], [[1]]))])
+
+    hinted = dict()
+    monkeypatch.setattr(utils, "set_solution_hints", lambda s, solver, hints: hinted.update(hints))
+    # the indicators are not given in sorted order, the weights belong to them in the given order
+    utils.init_solver_with_search_order(model, "ortools", [bv10, bv9], "default", hints=True, weights=[5, 1])
+    assert hinted[x] == 1 and hinted[bv10] is True and bv9 not in hinted
+
+
+def nested_constraints(AllDifferent, Table):
+    x = cp.intvar(0, 2, shape=3, name="x")
+    a, b = cp.boolvar(name="a"), cp.boolvar(name="b")
+    alldiff, table = AllDifferent(*x), Table(x, [[0, 0, 0], [1, 2, 0], [2, 2, 2]])
+    return [[(a & b).implies(alldiff)],
+            [alldiff | table],
+            [a.implies(alldiff & table)],
+            [a | ~alldiff],
+            [cp.Xor([a, table])],
+            [(alldiff == b)],
+            [alldiff, a.implies(table)]], list(x) + [a, b]
+
+def test_normalize_half_reifications():
+    reformulated, vars = nested_constraints(AllDifferentAuxHalfReif, TableAuxHalfReif)
+    reference, ref_vars = nested_constraints(cp.AllDifferent, cp.Table)
+    for cons, ref in zip(reformulated, reference):
+        sat_cache.clear()
+        assert solutions(utils.decompose_globals(cons, solver="ortools"), vars) == solutions(ref, ref_vars), str(ref)
+
+def test_hints_skipped_for_choco(capsys):
+    x = cp.intvar(0, 2, name="x")
+    utils.set_solution_hints(None, "choco", {x: 1})
+    assert "not supported by choco" in capsys.readouterr().out
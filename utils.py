@@ -1,36 +1,145 @@
 from natsort import natsorted
 import copy
+import json
+from os.path import exists
 
 import cpmpy as cp
 from cpmpy.transformations.get_variables import get_variables
 from cpmpy.transformations.normalize import toplevel_list
 from cpmpy.expressions.globalconstraints import GlobalConstraint
-from cpmpy.expressions.core import Operator
+from cpmpy.expressions.core import Expression, Operator
+from cpmpy.expressions.utils import is_any_list
+from cpmpy.expressions.variables import _BoolVarImpl, _NumVarImpl, NegBoolView
 
 from globalconstraints import *
+from globalconstraints.superclass import check_if_sat_batch, check_if_sat_parallel, share_aux_vars
+from globalconstraints.profiler import profiler
+from globalconstraints.deadline import limit_time
 
-def decompose_globals(list_of_cons, solver, solver_kwargs=dict()):
+def has_custom_global(expr):
+    """
+        Check if `expr` contains a CustomGlobal constraint.
+    """
+    if is_any_list(expr):
+        return any(has_custom_global(e) for e in expr)
+    if isinstance(expr, CustomGlobal):
+        return True
+    if isinstance(expr, Expression) and not isinstance(expr, _NumVarImpl):
+        return any(has_custom_global(a) for a in expr.args)
+    return False
+
+def replace_custom_globals(expr, polarity, newcons):
+    """
+        Replace the CustomGlobal constraints in `expr` by new indicator literals, their definitions are added to `newcons`.
+        `polarity` is the context of `expr`: 1 if positive, -1 if negative and 0 if both (e.g., under Xor or ==).
+
+        A global in positive context only needs to be half-reified by its indicator as `bv -> Global`.
+        In negative context, the indicator should be true whenever the global is satisfied as well.
+            As a CustomGlobal can only be half-reified, `~bv -> ~Global` is posted using its CPMpy version.
+    """
+    if is_any_list(expr):
+        return [replace_custom_globals(e, polarity, newcons) for e in expr]
+    if not has_custom_global(expr):
+        return expr
+
+    if isinstance(expr, CustomGlobal):
+        bv = cp.boolvar()
+        if polarity >= 0:
+            newcons.append(bv.implies(expr))
+        if polarity <= 0:
+            if getattr(expr, "cpm_global", None) is None:
+                raise ValueError(f"Cannot negate {expr}, it does not have a CPMpy version")
+            newcons.append((~bv).implies(~expr.cpm_global(*expr.args)))
+        return bv
+
+    if isinstance(expr, Operator) and expr.name in ("and", "or"):
+        args = [replace_custom_globals(a, polarity, newcons) for a in expr.args]
+    elif isinstance(expr, Operator) and expr.name == "->":
+        args = [replace_custom_globals(expr.args[0], -polarity, newcons),
+                replace_custom_globals(expr.args[1], polarity, newcons)]
+    elif isinstance(expr, Operator) and expr.name == "not":
+        args = [replace_custom_globals(expr.args[0], -polarity, newcons)]
+    else: # Xor, (in)equalities, sums, ...
+        args = [replace_custom_globals(a, 0, newcons) for a in expr.args]
+
+    expr = copy.copy(expr)
+    expr.update_args(args)
+    return expr
+
+def normalize_half_reifications(list_of_cons):
+    """
+        Rewrite the constraints containing CustomGlobal constraints to the shape bv -> Global.
+        E.g., (a & b) -> Global becomes (a & b) -> bv, bv -> Global and Global | Global2 becomes bv1 | bv2, bv1 -> Global, bv2 -> Global2.
+
+        This way, each global is rewritten using its `toplevel`, `iftrue` and `iffalse` methods in `decompose_globals`,
+            instead of ending up in a generic decomposition.
+    """
+    newlist = []
+    for cons in list_of_cons:
+        if isinstance(cons, Operator) and cons.name == "->" and isinstance(cons.args[0], _BoolVarImpl) \
+                and isinstance(cons.args[1], CustomGlobal):
+            newlist.append(cons) # already normalized
+        elif has_custom_global(cons):
+            newcons = []
+            newlist.append(replace_custom_globals(cons, 1, newcons))
+            newlist += newcons
+        else:
+            newlist.append(cons)
+    return newlist
+
+def decompose_globals(list_of_cons, solver, solver_kwargs=dict(), batch=False, n_workers=1, time_budget=None,
+                      share=False, deadline=None):
     """
         Rewrite/Decompose half-reified global constraints.
          Anytime we encounter bv -> Global, we rewrite this as:
             global.toplevel() /\ bv -> global.iftrue() /\ ~bv -> global.iffalse()
+        Globals nested in other Boolean structure are first half-reified by new indicators, see `normalize_half_reifications`.
 
         AuxGlobal global constraints need to call a solver here, so we set the `solver_kwargs` argument.
         For the experiments, we use the same solver as we use for actually solving the "main" model (e.g., maxcsp)
+
+        If `batch` is True, the feasibility of all AuxGlobal constraints is checked upfront in a single solver.
+        Otherwise, if `n_workers` > 1, they are checked upfront concurrently in a pool of worker processes,
+            all within `time_budget` seconds.
+        If `share` is True, AuxGlobal constraints share auxiliary copies where sound, see `share_aux_vars`.
+        If a `deadline` is given, each feasibility check only gets the time remaining until it.
     """
+    list_of_cons = normalize_half_reifications(toplevel_list(list_of_cons))
+
+    implications = [cons.args for cons in list_of_cons
+                    if isinstance(cons, Operator) and cons.name == "->" and isinstance(cons.args[1], AuxGlobal)]
+    aux_globals = [expr for _, expr in implications]
+    for expr in aux_globals:
+        expr.solver_kwargs = dict(solver=solver, **solver_kwargs)
+        expr.deadline = deadline
+    if batch:
+        check_if_sat_batch(aux_globals, solver=solver, deadline=deadline, **solver_kwargs)
+    elif n_workers > 1:
+        if deadline is not None and deadline.end is not None:
+            time_budget = deadline.remaining() if time_budget is None else min(time_budget, deadline.remaining())
+        check_if_sat_parallel(aux_globals, solver=solver, n_workers=n_workers, time_budget=time_budget,
+                              **limit_time(solver_kwargs, deadline))
+    if share:
+        share_aux_vars(implications)
+
     newlist = []
-    for cons in toplevel_list(list_of_cons):
+    for cons in list_of_cons:
 
         if isinstance(cons, Operator) and cons.name == "->":
             bv, expr = cons.args
             if isinstance(expr, CustomGlobal):
                 expr.solver_kwargs = dict(solver=solver, **solver_kwargs)
+                expr.deadline = deadline
+                expr.indicator = bv
                 # bv -> expr.iftrue()
-                newlist.append(bv.implies(cp.all(expr.iftrue())))
+                with profiler.span(f"iftrue[{expr.name}]"):
+                    newlist.append(bv.implies(cp.all(expr.iftrue())))
                 # ~bv -> expr.iffalse()
-                newlist.append((~bv).implies(cp.all(expr.iffalse())))
+                with profiler.span(f"iffalse[{expr.name}]"):
+                    newlist.append((~bv).implies(cp.all(expr.iffalse())))
                 # expr.toplevel()
-                newlist.append(expr.toplevel())
+                with profiler.span(f"toplevel[{expr.name}]"):
+                    newlist.append(expr.toplevel())
             elif isinstance(expr, GlobalConstraint):
                 print(f"Warning: found 'normal' CPMpy global constraint in half-reification: \n {cons}")
                 newlist.append(cons)
@@ -42,52 +151,239 @@ def decompose_globals(list_of_cons, solver, solver_kwargs=dict()):
     return newlist
 
 
-def init_solver_with_search_order(model, solver, bvs, search_order, **solver_kwargs):
+def init_solver_with_search_order(model, solver, bvs, search_order, decompose_kwargs=dict(), hints=False, weights=None,
+                                  deadline=None, **solver_kwargs):
+    """
+        Decompose the half-reified globals in `model` and post it to `solver`, with the given search order.
+        `decompose_kwargs` are passed on to `decompose_globals`.
+        If `hints` is True, the solver is warm-started from the witnesses of the globals, see `get_solution_hints`.
+        If a `deadline` is given, it is shared by all feasibility checks in `decompose_globals`.
+
+        The time spent in each phase is recorded in `profiler`, which is reset first.
+    """
+    profiler.reset()
+    # the indicators are sorted below, pair them with their weights first
+    bv_weights = dict(zip(bvs, weights)) if weights is not None else None
 
     d_model = copy.copy(model)
-    d_model.constraints = decompose_globals(model.constraints, solver=solver, solver_kwargs=solver_kwargs)
+    with profiler.span("decompose"):
+        d_model.constraints = decompose_globals(model.constraints, solver=solver, solver_kwargs=solver_kwargs,
+                                                deadline=deadline, **decompose_kwargs)
 
     # search order
-    orig = natsorted(set(get_variables(model.constraints)) - set(bvs), key=str) # original variables
-    aux = natsorted(set(get_variables(d_model.constraints)) - set(orig) - set(bvs), key=str) # auxiliary variables
-    bvs = natsorted(bvs, key=str)
+    with profiler.span("order"):
+        orig = natsorted(set(get_variables(model.constraints)) - set(bvs), key=str) # original variables
+        aux = natsorted(set(get_variables(d_model.constraints)) - set(orig) - set(bvs), key=str) # auxiliary variables
+        bvs = natsorted(bvs, key=str)
 
     assert set(orig) & set(aux) == set()
     assert set(orig) & set(bvs) == set()
     assert set(aux) & set(bvs) == set()
 
-    if search_order == "default":
-        order = []
-    elif search_order == "orig-bv-aux":
-        order = orig + bvs + aux
-    elif search_order == "bv-orig-aux":
-        order = bvs + orig + aux
-    else:
-        raise ValueError(f"Invalid search order: {search_order}")
+    phases = get_search_phases(search_order, orig, bvs, aux)
+    order = [var for vars, _ in phases for var in vars]
 
     s = cp.SolverLookup.get(solver)
-    s.solver_vars(order) # ensure insertion-order is respected
-    s += d_model.constraints
-    if d_model.objective_ is not None:
-        s.objective(d_model.objective_, d_model.objective_is_min)
+    s.transform = profiler.wrap("transform", s.transform) # time spent in transformations, excluded from "post"
+    with profiler.span("post"):
+        s.solver_vars(order) # ensure insertion-order is respected
+        s += d_model.constraints
+        if d_model.objective_ is not None:
+            s.objective(d_model.objective_, d_model.objective_is_min)
+
+    set_search_phases(s, solver, search_order, phases)
+
+    if hints:
+        with profiler.span("hints"):
+            set_solution_hints(s, solver, get_solution_hints(model.constraints, bv_weights))
+    return s
+
+
+def get_custom_globals(expr):
+    """
+        Get all CustomGlobal constraints in `expr`.
+    """
+    if is_any_list(expr):
+        return [g for e in expr for g in get_custom_globals(e)]
+    if isinstance(expr, CustomGlobal):
+        return [expr]
+    if isinstance(expr, Expression) and not isinstance(expr, _NumVarImpl):
+        return get_custom_globals(list(expr.args))
+    return []
+
+def get_solution_hints(list_of_cons, weights=None):
+    """
+        Get solution hints from the witnesses found by `check_if_sat`, for the AuxGlobal constraints in `list_of_cons`.
+        Should be called after `decompose_globals`, returns a dict mapping variables to their hinted value.
+
+        The auxiliary variables are hinted with the witness of their global, which satisfies it at the top-level.
+        For the original variables, a greedy solution is built by taking the witnesses in order of decreasing weight of their indicators,
+            skipping those which disagree with the witnesses taken before. The indicators of the taken globals are hinted to be true.
+        `weights` is a dict mapping indicators to their weight, missing indicators have weight 1.
+    """
+    weight = weights if weights is not None else dict()
+    aux_globals = [g for g in get_custom_globals(list_of_cons)
+                   if isinstance(g, AuxGlobal) and getattr(g, "sol", None) is not None]
+    aux_globals = sorted(aux_globals, key=lambda g: weight.get(getattr(g, "indicator", None), 1), reverse=True)
+
+    hints, values = dict(), dict()
+    for g in aux_globals:
+        if type(g).get_aux_vars is AuxGlobal.get_aux_vars: # skip globals replacing something else than the arguments
+            hints.update(g.get_aux_witness())
 
-    # solvers have different ways of setting search order
+        witness = g.get_witness()
+        if any(var in values and values[var] != val for var, val in witness.items()):
+            continue
+        values.update(witness)
+        bv = getattr(g, "indicator", None)
+        if isinstance(bv, NegBoolView):
+            hints[bv._bv] = False
+        elif isinstance(bv, _BoolVarImpl):
+            hints[bv] = True
+
+    hints.update(values)
+    return hints
+
+def set_solution_hints(s, solver, hints):
+    """
+        Warm-start the solver `s` with the `hints`, a dict mapping variables to values.
+        Hints are skipped for choco, with a warning.
+    """
+    if len(hints) == 0:
+        return
+    vars, vals = list(hints.keys()), [int(val) for val in hints.values()]
+
+    if solver == "choco":
+        # pychoco does not expose solution hints, so choco starts without them
+        print(f"Warning: solution hints are not supported by choco, skipping {len(hints)} hints")
+    elif solver == "cpo":
+        from docplex.cp.solution import CpoModelSolution
+        start = CpoModelSolution()
+        for var, val in zip(s.solver_vars(vars), vals):
+            start.add_integer_var_solution(var, val)
+        s.cpo_model.set_starting_point(start)
+    else:
+        # raises a NotSupportedError for solvers without solution hints
+        s.solution_hint(vars, vals)
+
+
+def get_search_phases(search_order, orig, bvs, aux):
+    """
+        Get the search phases for `search_order`, given the original variables, indicators and auxiliary variables.
+        A search phase is a tuple (vars, value), branching on `vars` in input order and selecting their "min" or "max" value first.
+        The phases are followed one after the other, an empty list leaves the search to the solver.
+
+        "bvmax-orig-aux" first tries to satisfy all soft constraints of a Max-CSP, before branching on the other variables.
+    """
     if search_order == "default":
-        pass
-    elif solver == "choco":
+        return []
+    if search_order == "orig-bv-aux":
+        return [(orig + bvs + aux, "max")]
+    if search_order == "bv-orig-aux":
+        return [(bvs + orig + aux, "max")]
+    if search_order == "bvmax-orig-aux":
+        return [(bvs, "max"), (orig + aux, "min")]
+    raise ValueError(f"Invalid search order: {search_order}")
+
+def set_search_phases(s, solver, search_order, phases):
+    """
+        Install the search `phases` in the solver `s`, solvers have different ways of setting a search order.
+    """
+    phases = [(vars, value) for vars, value in phases if len(vars)]
+    if len(phases) == 0:
+        return
+
+    if solver == "choco":
+        # choco only supports a single input order strategy
+        if len({value for _, value in phases}) > 1:
+            raise ValueError(f"Cannot set search order {search_order} for solver {solver}")
+        order = [var for vars, _ in phases for var in vars]
         s.chc_solver = s.native_model.get_solver()
-        s.chc_solver.set_input_order_ub_search(s.solver_vars(order))
+        if phases[0][1] == "max":
+            s.chc_solver.set_input_order_ub_search(s.solver_vars(order))
+        else:
+            s.chc_solver.set_input_order_lb_search(s.solver_vars(order))
+
+    elif solver == "ortools":
+        from ortools.sat.python import cp_model as ort
+        for vars, value in phases:
+            s.ort_model.AddDecisionStrategy(s.solver_vars(vars), ort.CHOOSE_FIRST,
+                                            ort.SELECT_MAX_VALUE if value == "max" else ort.SELECT_MIN_VALUE)
+        # without fixed search, the decision strategies are only used by some of the workers
+        s.ort_solver.parameters.search_branching = ort.FIXED_SEARCH
+
+    elif solver == "cpo":
+        from docplex.cp.modeler import search_phase, select_smallest, select_largest, var_index, value as var_value
+        cpo_phases = []
+        for vars, value in phases:
+            cpo_vars = s.solver_vars(vars)
+            cpo_phases.append(search_phase(cpo_vars,
+                                           select_smallest(var_index(cpo_vars)),
+                                           select_largest(var_value()) if value == "max" else select_smallest(var_value())))
+        s.cpo_model.set_search_phases(cpo_phases)
+
     else:
         raise ValueError(f"Cannot set search order {search_order} for solver {solver}")
 
-    return s
 
+def result_key(config):
+    """
+        Key identifying an experiment in the result store, based on its config dict (solver, constraint, fname/seed, ...)
+    """
+    return json.dumps(config, sort_keys=True, default=str)
 
-def plot_results(df, **kwargs):
+def append_result(fname, result, config):
+    """
+        Append a single result to the on-disk result store `fname`, stored as one JSON object per line.
+        The config is stored alongside the result, so finished experiments can be skipped when restarting.
+    """
+    line = json.dumps(dict(key=result_key(config), result=result),
+                      default=lambda o: o.item() if hasattr(o, "item") else str(o))
+    with open(fname, "a") as f:
+        f.write(line + "\n")
+        f.flush()
 
+def iter_results(fname):
+    """
+        Iterate over the (key, result) pairs in the result store `fname`.
+        A truncated last line (e.g., after a crash while writing) is ignored.
+    """
+    if not exists(fname):
+        return
+    with open(fname, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            yield entry["key"], entry["result"]
+
+def get_finished_keys(fname):
+    """
+        Get the keys of all experiments already in the result store `fname`.
+        Experiments which raised an error are not finished, so they are run again.
+    """
+    return {key for key, result in iter_results(fname) if result.get("status") != "error"}
+
+def read_results(fname):
+    """
+        Read the result store `fname` into a pandas DataFrame.
+        Only the last result of each experiment is kept, experiments which raised an error are retried.
+    """
+    import pandas as pd
+    results = {key : result for key, result in iter_results(fname)}
+    return pd.DataFrame(list(results.values()))
+
+def plot_results(df, **kwargs):
+    """
+        Plot the results in `df`, either a DataFrame or the path to a result store.
+    """
     import seaborn as sns
     import matplotlib.pyplot as plt
 
+    if isinstance(df, str):
+        df = read_results(df)
+
     df['total_time'] = df[[col for col in df.columns if "time" in col]].sum(axis=1)
     ax = sns.ecdfplot(
         data = df[df['status'] != 'timeout'],